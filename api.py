@@ -0,0 +1,105 @@
+# api.py
+# JSON API for organizers' own tickets.
+#
+# GET /api/tickets?limit=50&after=<id>&fields=id,name,total
+#   - keyset pagination on ticket id (pass `next_cursor` back as `after`)
+#   - `fields` picks columns; only those are selected from the DB
+#   - ETag comes from User.ticket_version, so a poll with If-None-Match gets a
+#     304 from the already-loaded user row without reading any tickets
+from functools import wraps
+
+from flask import Blueprint, current_app, jsonify, request
+from flask_login import current_user
+from sqlalchemy import select
+
+from models import db, Ticket
+from pricing import quote_ticket
+from queries import MAX_ID
+
+api_bp = Blueprint("api", __name__, url_prefix="/api")
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+# field -> columns it needs
+TICKET_FIELDS = {
+    "id": ("id",),
+    "name": ("name",),
+    "price": ("price",),
+    "fee_percent": ("price", "fee_percent"),
+    "total": ("price", "fee_percent"),
+    "total_cents": ("price", "fee_percent"),
+}
+_PRICED = {"fee_percent", "total", "total_cents"}
+
+
+def api_login_required(view):
+    """Like login_required, but a 401 JSON body instead of a redirect to /login."""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return jsonify({"error": "unauthorized"}), 401
+        return view(*args, **kwargs)
+    return wrapped
+
+def _bad_request(msg):
+    return jsonify({"error": msg}), 400
+
+
+@api_bp.get("/tickets")
+@api_login_required
+def list_tickets():
+    try:
+        limit = min(max(int(request.args.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        after = min(max(int(request.args.get("after", 0)), 0), MAX_ID)  # ids are all in between
+    except ValueError:
+        return _bad_request("limit and after must be integers")
+
+    raw_fields = request.args.get("fields")
+    fields = [f.strip() for f in raw_fields.split(",") if f.strip()] if raw_fields else list(TICKET_FIELDS)
+    unknown = [f for f in fields if f not in TICKET_FIELDS]
+    if unknown:
+        return _bad_request(f"unknown fields: {', '.join(unknown)}")
+
+    # Validator depends only on the user's counter and the query shape
+    etag = f"tickets-{current_user.id}-{current_user.ticket_version}-{after}-{limit}-{','.join(fields)}"
+    if request.if_none_match.contains_weak(etag):
+        resp = current_app.response_class(status=304)
+        resp.set_etag(etag, weak=True)
+        resp.headers["Cache-Control"] = "private, no-cache"
+        return resp
+
+    cols = {"id"} | {c for f in fields for c in TICKET_FIELDS[f]}
+    stmt = (
+        select(*[getattr(Ticket, c) for c in sorted(cols)])
+        .where(Ticket.user_id == current_user.id, Ticket.id > after)
+        .order_by(Ticket.id)
+        .limit(limit + 1)
+    )
+    rows = db.session.execute(stmt).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    items = []
+    for row in rows:
+        item = {}
+        quote = quote_ticket(row, current_user) if _PRICED & set(fields) else None
+        for f in fields:
+            if f == "fee_percent":
+                item[f] = quote.fee_percent
+            elif f == "total":
+                item[f] = round(quote.total_price, 2)
+            elif f == "total_cents":
+                item[f] = quote.total_cents
+            else:
+                item[f] = getattr(row, f)
+        items.append(item)
+
+    resp = jsonify({
+        "tickets": items,
+        "next_cursor": rows[-1].id if has_more else None,
+        "version": current_user.ticket_version,
+    })
+    resp.set_etag(etag, weak=True)
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
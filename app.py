@@ -1,32 +1,13 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, abort
-from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from flask_bcrypt import Bcrypt
-from flask_wtf import CSRFProtect
+from flask import Flask
 from flask_wtf.csrf import generate_csrf
 from dotenv import load_dotenv
-from datetime import datetime, timezone as dt_timezone
-from pytz import timezone as pytz_timezone
-from urllib.parse import urlparse, urljoin, quote_plus
-from flask_migrate import Migrate
-from flask_mail import Mail, Message
-from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
-from sqlalchemy import func
-import stripe, qrcode, io, base64, os
+import os
 
-from forms import LoginForm, RegisterForm, TicketForm
-from models import db, User, Ticket
+from extensions import db, bcrypt, csrf, login_manager
 
 # ------------------ Setup ------------------
 load_dotenv()
 
-# ===== TONIGHT MODE SWITCH =====
-# Set to True to disable email confirmation + allow QR flow without Stripe Connect.
-# Later, set to False to restore normal behavior.
-TONIGHT_MODE = True
-
-app = Flask(__name__)
-app.config.from_pyfile('config.py')  # expects SECRET_KEY, SQLALCHEMY_DATABASE_URI, mail settings, etc.
-
 # --- Mail + security fallbacks from ENV (safe defaults) ---
 def _env_bool(name, default):
     val = os.getenv(name)
@@ -34,380 +15,90 @@ def _env_bool(name, default):
         return default
     return str(val).strip() in ("1", "true", "True", "yes", "on")
 
-app.config.setdefault("MAIL_SERVER", os.getenv("MAIL_SERVER", "smtp.gmail.com"))
-app.config.setdefault("MAIL_PORT", int(os.getenv("MAIL_PORT", 587)))
-app.config.setdefault("MAIL_USE_TLS", _env_bool("MAIL_USE_TLS", True))
-app.config.setdefault("MAIL_USE_SSL", _env_bool("MAIL_USE_SSL", False))
-app.config.setdefault("MAIL_USERNAME", os.getenv("MAIL_USERNAME"))
-app.config.setdefault("MAIL_PASSWORD", os.getenv("MAIL_PASSWORD"))
-app.config.setdefault("MAIL_DEFAULT_SENDER", os.getenv("MAIL_DEFAULT_SENDER", "Team Event Lock <noreply@teameventlock.com>"))
-# Suppress sending entirely tonight so SMTP is never hit
-app.config["MAIL_SUPPRESS_SEND"] = True if TONIGHT_MODE else _env_bool("MAIL_SUPPRESS_SEND", False)
-
-# SECRET_KEY fallback
-app.config.setdefault("SECRET_KEY", os.getenv("SECRET_KEY", "change-me"))
-
-# salt + expiration for confirm tokens (kept for later)
-app.config.setdefault("SECURITY_CONFIRM_SALT", os.getenv("SECURITY_CONFIRM_SALT", "change-me-too"))
-app.config.setdefault("CONFIRM_TOKEN_EXPIRATION", int(os.getenv("CONFIRM_TOKEN_EXPIRATION", 60 * 60 * 24)))  # 24h
-
-db.init_app(app)
-migrate = Migrate(app, db)
-
-bcrypt = Bcrypt(app)
-csrf = CSRFProtect(app)
-app.jinja_env.globals['csrf_token'] = generate_csrf
-
-login_manager = LoginManager(app)
-login_manager.login_view = 'login'
-
-# Stripe
-stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
-
-# Mail
-mail = Mail(app)
-
-# (Optional) Stripe Connect blueprint
-try:
+def create_app(test_config=None):
+    """
+    Build the app. Cheap on purpose: stripe, qrcode, flask_mail, pytz and
+    itsdangerous are imported on first use (see lazy_imports.py), so a respawned
+    gunicorn worker is serving again quickly.
+    """
+    app = Flask(__name__)
+    app.config.from_pyfile('config.py')  # expects SECRET_KEY, SQLALCHEMY_DATABASE_URI, mail settings, etc.
+    if test_config:
+        app.config.update(test_config)
+
+    # Behind nginx (PROXY_X_FOR set): take the client address from X-Forwarded-For
+    # (storefront rate limits key on it). Off by default, the header is client-controlled.
+    if app.config.get("PROXY_X_FOR"):
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["PROXY_X_FOR"], x_proto=0)
+
+    app.config.setdefault("MAIL_SERVER", os.getenv("MAIL_SERVER", "smtp.gmail.com"))
+    app.config.setdefault("MAIL_PORT", int(os.getenv("MAIL_PORT", 587)))
+    app.config.setdefault("MAIL_USE_TLS", _env_bool("MAIL_USE_TLS", True))
+    app.config.setdefault("MAIL_USE_SSL", _env_bool("MAIL_USE_SSL", False))
+    app.config.setdefault("MAIL_USERNAME", os.getenv("MAIL_USERNAME"))
+    app.config.setdefault("MAIL_PASSWORD", os.getenv("MAIL_PASSWORD"))
+    app.config.setdefault("MAIL_DEFAULT_SENDER", os.getenv("MAIL_DEFAULT_SENDER", "Team Event Lock <noreply@teameventlock.com>"))
+    # Suppress sending entirely tonight so SMTP is never hit
+    app.config["MAIL_SUPPRESS_SEND"] = True if app.config.get("TONIGHT_MODE") else _env_bool("MAIL_SUPPRESS_SEND", False)
+
+    # SECRET_KEY fallback
+    app.config.setdefault("SECRET_KEY", os.getenv("SECRET_KEY", "change-me"))
+
+    # salt + expiration for confirm tokens (kept for later)
+    app.config.setdefault("SECURITY_CONFIRM_SALT", os.getenv("SECURITY_CONFIRM_SALT", "change-me-too"))
+    app.config.setdefault("CONFIRM_TOKEN_EXPIRATION", int(os.getenv("CONFIRM_TOKEN_EXPIRATION", 60 * 60 * 24)))  # 24h
+
+    # Before anything touches app.logger, so Flask doesn't add its own stderr handler
+    import logging_setup
+    logging_setup.init_app(app)
+
+    from db_routing import configure_replicas
+    configure_replicas(app)
+    db.init_app(app)
+    import sqlite_profile
+    sqlite_profile.init_app(app)  # WAL/PRAGMAs + one writer at a time; no-op off SQLite
+    bcrypt.init_app(app)
+    csrf.init_app(app)
+    app.jinja_env.globals['csrf_token'] = generate_csrf
+    login_manager.init_app(app)
+
+    # Flask-Migrate pulls in Alembic (~200ms); only the `flask` CLI needs it
+    if os.getenv("FLASK_RUN_FROM_CLI"):
+        from flask_migrate import Migrate
+        Migrate(app, db)
+
+    # ------------------ Blueprints ------------------
+    # Registered unconditionally: an import error here should stop boot, not hide routes.
+    from views import main_bp
     from connect_routes import connect_bp
+    from health import health_bp
+    from api import api_bp
+    from kiosk import kiosk_bp
+    from storefront import storefront_bp
+    import metrics
+    app.register_blueprint(main_bp)
     app.register_blueprint(connect_bp)
     csrf.exempt(connect_bp)
-except Exception:
-    pass
-
-# ------------------ Helpers ------------------
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
-
-def is_safe_url(target: str) -> bool:
-    host_url = urlparse(request.host_url)
-    test_url = urlparse(urljoin(request.host_url, target))
-    return (test_url.scheme in ("http", "https")) and (host_url.netloc == test_url.netloc)
-
-# ----- Email Confirmation helpers (kept for later) -----
-def _ts() -> URLSafeTimedSerializer:
-    secret = app.config.get("SECRET_KEY") or "change-me"
-    salt = app.config.get("SECURITY_CONFIRM_SALT") or "change-me-too"
-    return URLSafeTimedSerializer(secret, salt=salt)
-
-def generate_confirm_token(user_id: int) -> str:
-    return _ts().dumps({"uid": user_id})
-
-def verify_confirm_token(token: str, max_age: int | None = None):
-    if max_age is None:
-        max_age = int(app.config.get("CONFIRM_TOKEN_EXPIRATION", 3600))
-    try:
-        data = _ts().loads(token, max_age=max_age)
-        return data.get("uid")
-    except SignatureExpired:
-        app.logger.warning("Email confirmation token expired")
-        return None
-    except BadSignature:
-        app.logger.warning("Invalid email confirmation token")
-        return None
-
-def send_confirmation_email(user: User):
-    """Tonight: do nothing (no SMTP) so routes never hang or 500."""
-    if TONIGHT_MODE or app.config.get("MAIL_SUPPRESS_SEND"):
-        app.logger.info("Email sending disabled (TONIGHT_MODE) for %s", user.email)
-        return
-    # (Normal mode implementation kept for later)
-    token = generate_confirm_token(user.id)
-    confirm_url = url_for("confirm_email", token=token, _external=True)
-    subject = "Confirm your Team Event Lock email"
-    try:
-        text_body = render_template("emails/confirm.txt", user=user, confirm_url=confirm_url)
-        html_body = render_template("emails/confirm.html", user=user, confirm_url=confirm_url)
-    except Exception as e:
-        app.logger.exception("Email template render failed: %s", e)
-        text_body = f"Confirm your account: {confirm_url}"
-        html_body = None
-    try:
-        msg = Message(subject=subject, recipients=[user.email], body=text_body)
-        if html_body:
-            msg.html = html_body
-        if not getattr(msg, "sender", None):
-            msg.sender = app.config.get("MAIL_DEFAULT_SENDER")
-        mail.send(msg)
-    except Exception as e:
-        app.logger.exception("SMTP send failed: %s", e)
-        return
-
-# ------------------ TONIGHT: disable email-confirmation gate ------------------
-@app.before_request
-def _gate_unconfirmed():
-    # Do nothing so users can use the app without confirming email.
-    return
-
-# ------------------ Auth ------------------
-@app.route('/register', methods=['GET', 'POST'])
-def register():
-    form = RegisterForm()
-    if form.validate_on_submit():
-        email = (form.email.data or "").strip().lower()
-        existing_user = User.query.filter(func.lower(User.email) == email).first()
-        if existing_user:
-            flash('Email already registered.', 'error')
-            return redirect(url_for('register'))
-
-        hashed_pw = bcrypt.generate_password_hash(form.password.data).decode('utf-8')
-        new_user = User(email=email, password=hashed_pw)
-
-        # In tonight mode, auto-confirm so login/UI never blocks
-        if TONIGHT_MODE:
-            try:
-                new_user.email_confirmed_at = datetime.now(dt_timezone.utc)
-            except Exception:
-                pass
-
-        db.session.add(new_user)
-        db.session.commit()
-
-        # Try to send (no-op tonight)
-        try:
-            send_confirmation_email(new_user)
-            if not TONIGHT_MODE:
-                flash('Registration successful! Please check your email to confirm before logging in.', 'success')
-            else:
-                flash('Registration successful!', 'success')
-        except Exception:
-            app.logger.exception("Signup confirmation email failed")
-            flash('Registration succeeded.', 'success')
-
-        return redirect(url_for('login'))
-    return render_template('register.html', form=form)
-
-@app.route('/login', methods=['GET', 'POST'])
-def login():
-    form = LoginForm()
-    if form.validate_on_submit():
-        email = (form.email.data or "").strip().lower()
-        user = User.query.filter(func.lower(User.email) == email).first()
-        if user and bcrypt.check_password_hash(user.password, form.password.data):
-            login_user(user)
-
-            # ---- optional payouts gate (bypassed in tonight mode) ----
-            needs_payouts = False
-            if not TONIGHT_MODE:
-                acct_id = getattr(user, "stripe_account_id", None)
-                if not acct_id or not getattr(user, "charges_enabled", False):
-                    needs_payouts = True
-                else:
-                    try:
-                        acct = stripe.Account.retrieve(acct_id)
-                        needs_payouts = not (acct.charges_enabled and acct.payouts_enabled)
-                    except Exception:
-                        needs_payouts = True
-
-            if needs_payouts:
-                return redirect(url_for('payouts'))
-
-            next_url = request.args.get("next")
-            if next_url and is_safe_url(next_url):
-                return redirect(next_url)
-            return redirect(url_for('index'))
-
-        flash('Invalid email or password.')
-    return render_template('login.html', form=form)
-
-@app.route('/logout')
-@login_required
-def logout():
-    logout_user()
-    return redirect(url_for('login'))
-
-@app.route('/settings', methods=['GET'])
-@login_required
-def settings():
-    stripe_connect_link = url_for('payouts')
-    return render_template('settings.html', user=current_user, stripe_connect_link=stripe_connect_link)
-
-# ------------------ Dashboard (create up to 5 tickets) ------------------
-@app.route('/dashboard', methods=['GET', 'POST'])
-@login_required
-def dashboard():
-    form = TicketForm()
-    tickets = Ticket.query.filter_by(user_id=current_user.id).all()
-
-    if form.validate_on_submit():
-        raw = request.form.get('fee_percent_override', '12')
-        try:
-            pct = float(raw)
-        except (TypeError, ValueError):
-            pct = 12.0
-        pct = max(5.0, min(20.0, pct))
-        current_user.fee_percent = pct
-
-        t = Ticket(name=form.name.data, price=form.price.data, user_id=current_user.id)
-        db.session.add(t)
-        db.session.commit()
-        flash("Ticket added.")
-        return redirect(url_for('dashboard'))
-
-    return render_template('dashboard.html', form=form, tickets=tickets)
-
-# ------------------ Home: generate QR for selected ticket ------------------
-@app.route('/', methods=['GET', 'POST'])
-@login_required
-def index():
-    # TONIGHT: do NOT force Stripe Connect; fall back to platform charges if needed
-    tickets = Ticket.query.filter_by(user_id=current_user.id).all()
-    has_tickets = len(tickets) > 0
-
-    if request.method == 'POST':
-        ticket_id_raw = request.form.get('ticket_id')
-        if not ticket_id_raw:
-            flash("Please select a ticket first.")
-            return redirect(url_for('index'))
-        try:
-            ticket_id = int(ticket_id_raw)
-        except (TypeError, ValueError):
-            flash("Invalid ticket selection.")
-            return redirect(url_for('index'))
-
-        sel = Ticket.query.get(ticket_id)
-        if not sel or sel.user_id != current_user.id:
-            flash("Ticket not found or not yours.")
-            return redirect(url_for('index'))
-
-        base_price = float(sel.price)
-        pct = sel.fee_percent or getattr(current_user, "fee_percent", 12.0)
-        pct = max(5.0, min(20.0, float(pct)))
-
-        fee_total = base_price * (pct / 100.0)
-        total_price = base_price + fee_total
-        total_cents = int(round(total_price * 100))
-
-        # Your original "half of fee" platform logic
-        platform_fee_cents = int(round((fee_total * 0.5) * 100))
-        platform_fee_cents = min(platform_fee_cents, max(total_cents - 1, 0))
-
-        success_url = (
-            "https://teameventlock.com/success"
-            f"?ticket={quote_plus(sel.name)}&price={total_price:.2f}"
-        )
-        cancel_url = url_for('index', _external=True)
-
-        try:
-            if getattr(current_user, "stripe_account_id", None) and getattr(current_user, "charges_enabled", False):
-                # Connected account: split payout (same as before)
-                session = stripe.checkout.Session.create(
-                    mode='payment',
-                    line_items=[{
-                        'price_data': {
-                            'currency': 'usd',
-                            'product_data': {'name': sel.name},
-                            'unit_amount': total_cents,
-                        },
-                        'quantity': 1,
-                    }],
-                    success_url=success_url,
-                    cancel_url=cancel_url,
-                    payment_intent_data={
-                        'application_fee_amount': platform_fee_cents,
-                        'transfer_data': {'destination': current_user.stripe_account_id},
-                        'on_behalf_of': current_user.stripe_account_id,
-                    },
-                )
-                print(f"[INDEX] split Session {session.id} -> acct {current_user.stripe_account_id} total_cents={total_cents} fee_half_cents={platform_fee_cents} pct={pct}")
-            else:
-                # Not connected: route funds to platform (NO transfer_data / NO application_fee_amount)
-                session = stripe.checkout.Session.create(
-                    mode='payment',
-                    line_items=[{
-                        'price_data': {
-                            'currency': 'usd',
-                            'product_data': {'name': sel.name},
-                            'unit_amount': total_cents,
-                        },
-                        'quantity': 1,
-                    }],
-                    success_url=success_url,
-                    cancel_url=cancel_url,
-                )
-                print(f"[INDEX] platform Session {session.id} total_cents={total_cents} pct={pct} (no connect)")
-        except Exception as e:
-            print(f"[INDEX][StripeError] {e}")
-            flash("Couldn’t start checkout with Stripe. Please try again.")
-            return redirect(url_for('index'))
-
-        try:
-            qr = qrcode.make(session.url)
-            buffered = io.BytesIO()
-            qr.save(buffered, format="PNG")
-            img_str = base64.b64encode(buffered.getvalue()).decode()
-        except Exception as e:
-            print(f"[INDEX][QRError] {e}")
-            flash("Failed to generate the QR code.")
-            return redirect(url_for('index'))
-
-        return render_template('qrcode.html', img_data=img_str, ticket_name=sel.name, total_price=total_price)
-
-    return render_template('index.html', tickets=tickets, has_tickets=has_tickets)
-
-# ------------------ Payouts (Stripe Connect onboarding) ------------------
-@app.route('/payouts')
-@login_required
-def payouts():
-    # Still viewable; not enforced in TONIGHT_MODE
-    return render_template('payouts.html')
-
-# ------------------ Email confirmation routes ------------------
-@app.route("/confirm")
-@login_required
-def send_confirm():
-    # No-op tonight so nobody gets blocked
-    flash("Email confirmation is temporarily disabled — you're good to go.", "info")
-    return redirect(url_for("dashboard"))
-
-@app.route("/confirm/<token>")
-@login_required
-def confirm_email(token):
-    # Kept for later; not used tonight
-    uid = verify_confirm_token(token)
-    if not uid or uid != current_user.id:
-        flash("Invalid or expired confirmation link.", "error")
-        return redirect(url_for("dashboard"))
-    if getattr(current_user, "email_confirmed_at", None):
-        flash("Email already confirmed.", "info")
-        return redirect(url_for("dashboard"))
-    current_user.email_confirmed_at = datetime.now(dt_timezone.utc)
-    db.session.commit()
-    flash("Email confirmed! Thanks.", "success")
-    return redirect(url_for("dashboard"))
-
-# ------------------ Misc ------------------
-@app.route('/ticket/<int:ticket_id>')
-def ticket_scan(ticket_id):
-    t = Ticket.query.get_or_404(ticket_id)
-    return f"Scanned ticket: {t.name} - ${t.price}"
-
-@app.route('/success')
-def success():
-    eastern = pytz_timezone('US/Eastern')
-    ticket = request.args.get('ticket', default='Unknown Ticket')
-    price = request.args.get('price', default='0.00')
-    timestamp = datetime.now(eastern).strftime('%B %d, %Y at %I:%M %p')
-    return render_template('success.html', ticket=ticket, price=price, timestamp=timestamp)
-
-@app.route('/_debug')
-def debug_check():
-    return "✔ App is running"
-
-@app.route('/ticket/<int:ticket_id>/delete', methods=['POST'])
-@login_required
-def delete_ticket(ticket_id):
-    t = Ticket.query.get_or_404(ticket_id)
-    if t.user_id != current_user.id:
-        abort(403)
-    db.session.delete(t)
-    db.session.commit()
-    flash('Ticket deleted.')
-    return redirect(url_for('dashboard'))
+    app.register_blueprint(api_bp)  # GET-only, so CSRF never applies
+    app.register_blueprint(kiosk_bp)
+    app.register_blueprint(storefront_bp)
+    app.register_blueprint(health_bp)
+    metrics.init_app(app)  # request/DB pool instrumentation + /metrics
+    import http_cache
+    http_cache.init_app(app)  # gzip/brotli; per-route Cache-Control/ETags via @cache_policy
+
+    # CLI: `flask reconcile-stripe`, `flask prune-checkout-sessions`
+    from reconcile import reconcile_command
+    from checkout import prune_command
+    app.cli.add_command(reconcile_command)
+    app.cli.add_command(prune_command)
+
+    return app
 
 # ------------------ Local dev ------------------
 if __name__ == '__main__':
+    app = create_app()
     with app.app_context():
         db.create_all()
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,325 @@
+# checkout.py
+# Stripe Checkout Session creation for the QR flow.
+#
+# Requests for the same organizer, cart (tickets + quantities) and price inside
+# a short window share one idempotency key. The first request to claim the key (a row in
+# checkout_session) calls Stripe and renders the QR; identical requests on any
+# worker wait for that row instead of making their own Stripe call.
+#
+# The Stripe webhook moves rows on to "complete"/"expired". A finished session is
+# never handed out again: the next request chains a fresh key off its id.
+#
+# Rows are only useful while Stripe might still report on their session, so
+# prune_sessions() (`flask prune-checkout-sessions`, and every worker about once
+# an hour) deletes anything older than the window plus a session's lifetime.
+import base64
+import hashlib
+import io
+import logging
+import time
+from dataclasses import dataclass
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from lazy_imports import qrcode, stripe
+from metrics import qr_render_timer
+from models import db, CheckoutSession
+from pricing import cart_signature, parse_cart_signature
+from queries import MAX_ID
+from ratelimit import admit_checkout
+
+log = logging.getLogger(__name__)
+_table = CheckoutSession.__table__
+POLL_INTERVAL = 0.05  # seconds between checks while another worker creates the session
+MAX_LINE_ITEMS = 100  # Stripe's cap per Checkout Session in payment mode
+MAX_SIGNATURE_LEN = 500  # cart.signature goes in metadata['items']: Stripe caps values at 500 chars, as does stripe_charge.items
+DONE_STATUSES = ("complete", "expired")
+MIN_EXPIRY = 30 * 60  # Stripe won't expire a session sooner than 30 minutes
+MAX_EXPIRY = 24 * 3600  # ...or later than 24 hours (also the default lifetime)
+PRUNE_INTERVAL = 3600  # seconds between opportunistic prune_sessions() per worker
+_last_prune = 0.0
+
+
+class CheckoutRateLimited(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"checkout rate limited, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class CheckoutResult:
+    session_id: str
+    url: str
+    qr_png_b64: str | None
+    reused: bool
+
+
+def render_qr_png_b64(url: str) -> str:
+    with qr_render_timer():
+        qr = qrcode.make(url)
+        buffered = io.BytesIO()
+        qr.save(buffered, format="PNG")
+        return base64.b64encode(buffered.getvalue()).decode()
+
+def _fits(wanted):
+    """
+    Ids a ticket can actually have, few enough lines for one session, and a
+    signature short enough to round-trip through Stripe metadata.
+    """
+    return (all(0 < tid <= MAX_ID for tid in wanted)
+            and len(wanted) <= MAX_LINE_ITEMS
+            and len(cart_signature(wanted.items())) <= MAX_SIGNATURE_LEN)
+
+def cart_from_form(form):
+    """
+    {ticket_id: qty} from `qty_<ticket_id>` inputs (or the old single `ticket_id`
+    field). Empty dict if nothing was picked, None if the form is malformed.
+    """
+    max_qty = int(current_app.config.get("CART_MAX_QUANTITY", 20))
+    if form.get('ticket_id'):
+        try:
+            wanted = {int(form['ticket_id']): 1}
+        except ValueError:
+            return None
+        return wanted if _fits(wanted) else None
+    wanted = {}
+    for name, raw in form.items():
+        if not name.startswith('qty_') or not raw.strip():
+            continue
+        try:
+            tid, qty = int(name[4:]), int(raw)
+        except ValueError:
+            return None
+        if qty < 0 or qty > max_qty:
+            return None
+        if qty:
+            wanted[tid] = qty
+    return wanted if _fits(wanted) else None
+
+def cart_from_signature(raw):
+    """{ticket_id: qty} from a '7x2,9x1' string (kiosk URLs), same limits as cart_from_form. None if invalid."""
+    pairs = parse_cart_signature(raw)
+    if not pairs:
+        return None
+    max_qty = int(current_app.config.get("CART_MAX_QUANTITY", 20))
+    wanted = dict(pairs)
+    if len(wanted) != len(pairs) or not all(1 <= qty <= max_qty for qty in wanted.values()):
+        return None
+    return wanted if _fits(wanted) else None
+
+def _window():
+    return max(1, int(current_app.config.get("CHECKOUT_IDEMPOTENCY_WINDOW", 30)))
+
+def idempotency_key(user_id, cart_signature, total_cents, now=None) -> str:
+    bucket = int((now or time.time()) // _window())
+    raw = f"qr:{user_id}:{cart_signature}:{total_cents}:{bucket}"
+    return "qr-" + hashlib.sha256(raw.encode()).hexdigest()[:40]
+
+
+def _sequence(cart, after, buyer=None, kiosk=False):
+    """Key material for `cart`, or for "the next session after `after`" (kiosk rotation)."""
+    seq = cart.signature if after is None else f"{cart.signature}>{after}"
+    if kiosk:
+        # Kiosk sessions expire and cancel back to the kiosk: never share a key (or a
+        # session) with the door QR for the same cart, Stripe would refuse the params
+        seq = f"kiosk:{seq}"
+    return seq if buyer is None else f"{seq}@{buyer}"
+
+def _expires_at(now, expires_in):
+    """
+    Session expiry for a key claimed at `now`. Counted from the end of the key's
+    window, not from the clock, so a retry under the same key sends the same
+    params (Stripe rejects a reused key with different ones).
+    """
+    window = _window()
+    window_end = (int(now // window) + 1) * window
+    return window_end + min(max(int(expires_in), MIN_EXPIRY), MAX_EXPIRY - window)
+
+def _session_params(user, cart, success_url, cancel_url, expires_at=None):
+    # Reconciliation checks the charge against the quote made here (total_cents /
+    # fee_cents), not today's prices; ticket_id is kept for single-tier carts
+    order_metadata = {
+        'user_id': str(user.id),
+        'items': cart.signature,
+        'total_cents': str(cart.total_cents),
+        'fee_cents': str(cart.platform_fee_cents),
+    }
+    if len(cart.lines) == 1:
+        order_metadata['ticket_id'] = str(cart.lines[0].ticket.id)
+    line_items = [{
+        'price_data': {
+            'currency': 'usd',
+            'product_data': {'name': line.ticket.name},
+            'unit_amount': line.quote.total_cents,
+        },
+        'quantity': line.quantity,
+    } for line in cart.lines]
+    if getattr(user, "stripe_account_id", None) and getattr(user, "charges_enabled", False):
+        # Connected account: split payout
+        payment_intent_data = {
+            'application_fee_amount': cart.platform_fee_cents,
+            'transfer_data': {'destination': user.stripe_account_id},
+            'on_behalf_of': user.stripe_account_id,
+            'metadata': order_metadata,
+        }
+    else:
+        # Not connected: route funds to platform (NO transfer_data / NO application_fee_amount)
+        payment_intent_data = {'metadata': order_metadata}
+    params = dict(
+        mode='payment',
+        line_items=line_items,
+        success_url=success_url,
+        cancel_url=cancel_url,
+        payment_intent_data=payment_intent_data,
+    )
+    if expires_at:
+        params['expires_at'] = expires_at
+    return params
+
+def _claim(conn, key, user_id, ticket_id, total_cents):
+    """Insert the pending row for `key`. True if this request won the claim."""
+    ins = (postgresql if conn.dialect.name == "postgresql" else sqlite).insert(_table).values(
+        idem_key=key, user_id=user_id, ticket_id=ticket_id, total_cents=total_cents,
+        status="pending", created_at=time.time(),
+    )
+    return conn.execute(ins.on_conflict_do_nothing(index_elements=["idem_key"])).rowcount == 1
+
+def _wait_for(key, timeout):
+    """Poll the claimed row until its owner finishes (or we give up)."""
+    deadline = time.monotonic() + timeout
+    while True:
+        with db.engine.connect() as conn:
+            row = conn.execute(select(_table).where(_table.c.idem_key == key)).first()
+        if row is None or row.status != "pending" or time.monotonic() >= deadline:
+            return row
+        time.sleep(POLL_INTERVAL)
+
+def _finish(key, **values):
+    with db.engine.begin() as conn:
+        conn.execute(_table.update().where(_table.c.idem_key == key).values(**values))
+
+def _release(key):
+    """Drop our claim so the next identical request can try again."""
+    with db.engine.begin() as conn:
+        conn.execute(_table.delete().where(_table.c.idem_key == key, _table.c.status == "pending"))
+
+
+def checkout_for_cart(user, cart, success_url, cancel_url, after=None, expires_in=None, buyer=None, client=None,
+                      kiosk=False) -> CheckoutResult:
+    """
+    Return one Checkout Session + QR for the whole cart (see pricing.quote_cart),
+    reusing an identical in-flight or recent one. Raises CheckoutRateLimited, or
+    whatever Stripe raised.
+
+    `after` asks for the session that follows that (finished) session id, so
+    every kiosk showing the same cart moves on to the same next QR.
+
+    `buyer` (public storefront) keeps strangers buying the same cart on separate
+    sessions; only that buyer's double clicks coalesce. `client` (the buyer's
+    address) moves the rate limit onto the storefront buckets, see admit_checkout.
+    `kiosk` keeps kiosk sessions apart from door QRs for the same cart.
+    """
+    key_time = time.time()
+    key = idempotency_key(user.id, _sequence(cart, after, buyer, kiosk), cart.total_cents, key_time)
+    ticket_id = cart.lines[0].ticket.id if len(cart.lines) == 1 else None
+    for _ in range(4):
+        with db.engine.begin() as conn:
+            owner = _claim(conn, key, user.id, ticket_id, cart.total_cents)
+        if owner:
+            break
+        row = _wait_for(key, current_app.config.get("CHECKOUT_COALESCE_WAIT", 10.0))
+        if row is not None and row.status == "open":
+            return CheckoutResult(row.stripe_session_id, row.url, row.qr_png_b64, reused=True)
+        if row is not None and row.status in DONE_STATUSES:
+            # Paid or expired inside the window; Stripe would hand the same session back for this key
+            key_time = time.time()
+            key = idempotency_key(user.id, _sequence(cart, row.stripe_session_id, buyer, kiosk), cart.total_cents, key_time)
+            continue
+        if row is not None:
+            # Owner is slow or died; Stripe's idempotency key still dedupes our call
+            log.warning("coalesce wait expired, calling Stripe directly", extra={"category": "checkout.coalesce_timeout", "idem_key": key})
+            break
+        # Owner gave up (rate limited / Stripe error): claim it ourselves
+
+    # Only the caller that actually hits Stripe pays for a rate-limit token
+    retry_after = admit_checkout(user.id, client=client)
+    if retry_after is not None:
+        if owner:
+            _release(key)
+        raise CheckoutRateLimited(retry_after)
+
+    try:
+        session = stripe.checkout.Session.create(
+            idempotency_key=key,
+            **_session_params(user, cart, success_url, cancel_url,
+                              _expires_at(key_time, expires_in) if expires_in else None),
+        )
+    except Exception:
+        if owner:
+            _release(key)
+        raise
+
+    try:
+        img_str = render_qr_png_b64(session.url)
+    except Exception:
+        log.exception("QR render failed", extra={"category": "checkout.qr_error", "session_id": session.id})
+        img_str = None
+
+    _finish(key, status="open", stripe_session_id=session.id, url=session.url, qr_png_b64=img_str)
+    _maybe_prune()
+    return CheckoutResult(session.id, session.url, img_str, reused=False)
+
+
+def mark_session_status(stripe_session_id, status) -> bool:
+    """Webhook side: record that Stripe finished a session. A completed session stays completed."""
+    with db.engine.begin() as conn:
+        res = conn.execute(
+            _table.update()
+            .where(_table.c.stripe_session_id == stripe_session_id, _table.c.status != "complete")
+            .values(status=status)
+        )
+    return res.rowcount > 0
+
+def session_status(stripe_session_id):
+    with db.engine.connect() as conn:
+        return conn.execute(
+            select(_table.c.status).where(_table.c.stripe_session_id == stripe_session_id)
+        ).scalar()
+
+
+# ------------------ Retention ------------------
+def prune_sessions(now=None) -> int:
+    """
+    Delete checkout_session rows (and their QR PNGs) older than the idempotency
+    window plus Stripe's longest session lifetime: no request can coalesce onto
+    them and their session is over. Also clears `pending` rows left behind by
+    workers that died mid-call. Returns the number of rows deleted.
+    """
+    cutoff = (now or time.time()) - _window() - MAX_EXPIRY
+    with db.engine.begin() as conn:
+        return conn.execute(_table.delete().where(_table.c.created_at < cutoff)).rowcount
+
+def _maybe_prune():
+    global _last_prune
+    now = time.time()
+    if now - _last_prune < PRUNE_INTERVAL:
+        return
+    _last_prune = now
+    try:
+        deleted = prune_sessions(now)
+    except Exception:
+        log.exception("checkout session prune failed", extra={"category": "checkout.prune_error"})
+        return
+    if deleted:
+        log.info("pruned checkout sessions", extra={"category": "checkout.prune", "deleted": deleted})
+
+
+@click.command("prune-checkout-sessions")
+@with_appcontext
+def prune_command():
+    """Delete checkout sessions past their retention window."""
+    click.echo(f"[Checkout] pruned {prune_sessions()} sessions")
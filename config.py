@@ -8,6 +8,11 @@ BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 
 SECRET_KEY = os.getenv("SECRET_KEY", "defaultsecret")
 
+# ===== TONIGHT MODE SWITCH =====
+# Set to True to disable email confirmation + allow QR flow without Stripe Connect.
+# Later, set to False to restore normal behavior.
+TONIGHT_MODE = True
+
 # Database
 SQLALCHEMY_DATABASE_URI = (
     os.getenv("SQLALCHEMY_DATABASE_URI")
@@ -15,8 +20,28 @@ SQLALCHEMY_DATABASE_URI = (
 )
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+# SQLite in production (see sqlite_profile.py): WAL + tuned PRAGMAs on every
+# connection, and writers queue on a lock file next to the database instead of
+# racing for SQLite's lock. Ignored for Postgres. Check: scripts/check_sqlite_concurrency.py
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "1").strip() in ("1", "true", "True", "yes", "on")
+SQLITE_SERIALIZE_WRITES = os.getenv("SQLITE_SERIALIZE_WRITES", "1").strip() in ("1", "true", "True", "yes", "on")
+SQLITE_WRITE_LOCK_TIMEOUT = float(os.getenv("SQLITE_WRITE_LOCK_TIMEOUT", 10.0))  # seconds a writer waits its turn
+SQLITE_WRITE_LOCK_PATH = os.getenv("SQLITE_WRITE_LOCK_PATH")                    # default: <db file>.write-lock
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", 16384))   # per connection
+SQLITE_MMAP_SIZE_MB = int(os.getenv("SQLITE_MMAP_SIZE_MB", 256))       # shared page cache, not per process
+
+# Read replicas (comma-separated URLs). GET requests read from one of these unless
+# the browser wrote something in the last READ_YOUR_WRITES_SECONDS; see db_routing.py.
+# Local check with two databases: scripts/check_replica_routing.py
+SQLALCHEMY_REPLICA_URIS = [u.strip() for u in os.getenv("SQLALCHEMY_REPLICA_URIS", "").split(",") if u.strip()]
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", 5))
+
 # Stripe
 STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")  # must be sk_live_* or sk_test_*
+# `flask reconcile-stripe` re-lists charges/fees created this far back, to pick up refunds
+# and pending charges that have since settled
+STRIPE_RECONCILE_LOOKBACK = int(os.getenv("STRIPE_RECONCILE_LOOKBACK", 7 * 24 * 3600))  # seconds
 PLATFORM_BASE_URL = os.getenv("PLATFORM_BASE_URL", "https://teameventlock.com")
 
 # Email settings
@@ -30,3 +55,60 @@ MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER", "no-reply@teameventlock.c
 # Email confirmation security
 SECURITY_CONFIRM_SALT = os.getenv("SECURITY_CONFIRM_SALT", "change-me")
 CONFIRM_TOKEN_EXPIRATION = int(os.getenv("CONFIRM_TOKEN_EXPIRATION", 3600))  # 1 hour default
+
+# Checkout admission control (token buckets shared across workers, see ratelimit.py)
+CHECKOUT_USER_BURST = int(os.getenv("CHECKOUT_USER_BURST", 3))              # back-to-back QRs per organizer
+CHECKOUT_USER_PER_SEC = float(os.getenv("CHECKOUT_USER_PER_SEC", 0.5))      # then one every 2s
+CHECKOUT_PLATFORM_BURST = int(os.getenv("CHECKOUT_PLATFORM_BURST", 40))
+CHECKOUT_PLATFORM_PER_SEC = float(os.getenv("CHECKOUT_PLATFORM_PER_SEC", 20))  # well under Stripe's 100/s live limit
+CHECKOUT_WAIT_BUDGET = float(os.getenv("CHECKOUT_WAIT_BUDGET", 2.0))        # seconds a request may queue before we shed it
+
+# Identical checkout requests (same organizer, ticket and price) inside this window
+# share one Stripe session and QR; concurrent duplicates wait up to COALESCE_WAIT for it
+CHECKOUT_IDEMPOTENCY_WINDOW = int(os.getenv("CHECKOUT_IDEMPOTENCY_WINDOW", 30))  # seconds
+CHECKOUT_COALESCE_WAIT = float(os.getenv("CHECKOUT_COALESCE_WAIT", 10.0))        # seconds
+
+# Cart checkout: max quantity of any one ticket tier in a single QR
+CART_MAX_QUANTITY = int(os.getenv("CART_MAX_QUANTITY", 20))
+
+# Kiosk mode (/kiosk, see kiosk.py). Streams end before the gunicorn timeout and reconnect.
+KIOSK_STREAM_SECONDS = int(os.getenv("KIOSK_STREAM_SECONDS", 50))
+KIOSK_POLL_INTERVAL = float(os.getenv("KIOSK_POLL_INTERVAL", 1.0))   # seconds between session status checks
+KIOSK_SESSION_TTL = int(os.getenv("KIOSK_SESSION_TTL", 1800))        # unpaid kiosk sessions expire (Stripe min 30 min)
+
+# Public storefront (/e/<organizer id>, see storefront.py): rendered pages are kept
+# on disk and dropped on ticket/fee changes; the CDN/proxy may hold them for S_MAXAGE
+STOREFRONT_CACHE_DIR = os.getenv("STOREFRONT_CACHE_DIR")                  # default: <instance>/storefront
+STOREFRONT_CACHE_TTL = int(os.getenv("STOREFRONT_CACHE_TTL", 600))        # seconds; re-render even if nothing changed
+STOREFRONT_MAX_AGE = int(os.getenv("STOREFRONT_MAX_AGE", 30))             # browsers
+STOREFRONT_S_MAXAGE = int(os.getenv("STOREFRONT_S_MAXAGE", 60))           # shared caches
+# Storefront checkouts have their own buckets (see ratelimit.admit_checkout): per
+# buyer address, per organizer page, and storefront-wide, apart from CHECKOUT_PLATFORM_*
+STOREFRONT_CLIENT_BURST = int(os.getenv("STOREFRONT_CLIENT_BURST", 3))
+STOREFRONT_CLIENT_PER_SEC = float(os.getenv("STOREFRONT_CLIENT_PER_SEC", 0.2))   # one every 5s after the burst
+STOREFRONT_CHECKOUT_BURST = int(os.getenv("STOREFRONT_CHECKOUT_BURST", 30))
+STOREFRONT_CHECKOUT_PER_SEC = float(os.getenv("STOREFRONT_CHECKOUT_PER_SEC", 5))
+STOREFRONT_PLATFORM_BURST = int(os.getenv("STOREFRONT_PLATFORM_BURST", 40))
+STOREFRONT_PLATFORM_PER_SEC = float(os.getenv("STOREFRONT_PLATFORM_PER_SEC", 20))
+
+# Reverse proxies in front of gunicorn that append X-Forwarded-For (nginx = 1).
+# request.remote_addr is then the real client, which the storefront limits key on.
+# Leave at 0 when clients reach gunicorn directly: anyone could forge the header.
+PROXY_X_FOR = int(os.getenv("PROXY_X_FOR", 0))
+
+# Bulk ticket import (dashboard CSV/JSON upload, see ticket_import.py)
+TICKET_IMPORT_MAX_ROWS = int(os.getenv("TICKET_IMPORT_MAX_ROWS", 1000))
+
+# Response compression (see http_cache.py); brotli is used when the package is installed
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))  # bytes; smaller bodies aren't worth it
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", 6))
+COMPRESS_BR_QUALITY = int(os.getenv("COMPRESS_BR_QUALITY", 5))
+
+# Observability: if set, /metrics requires "Authorization: Bearer <token>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Logging: JSON lines on stdout via a background queue (see logging_setup.py)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_JSON = os.getenv("LOG_JSON", "1").strip() in ("1", "true", "True", "yes", "on")
+# Per-category sampling for chatty INFO lines, e.g. "checkout.reused=0.1,checkout.created=0.5"
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "checkout.reused=0.1")
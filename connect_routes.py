@@ -1,18 +1,20 @@
+import logging
 import os
 from urllib.parse import urlencode
 from dotenv import load_dotenv
 
-import stripe
 from flask import Blueprint, jsonify, request, redirect
 from flask_login import login_required, current_user
+from checkout import mark_session_status
+from lazy_imports import stripe
 from models import db
 
 # Load .env for local/dev; in production you also set envs via systemd
 load_dotenv()
 
-stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
 BASE_URL = os.getenv("PLATFORM_BASE_URL", "https://teameventlock.com")
 
+log = logging.getLogger(__name__)
 connect_bp = Blueprint("connect_bp", __name__)
 
 def _ensure_account_id_for(user):
@@ -40,8 +42,8 @@ def _ensure_account_id_for(user):
     # Existing account: re-request capabilities if not active or pending
     acct = stripe.Account.retrieve(acct_id)
     caps = getattr(acct, "capabilities", {}) or {}
-    needs_card = caps.get("card_payments") not in ("active", "pending")
-    needs_transfers = caps.get("transfers") not in ("active", "pending")
+    needs_card = getattr(caps, "card_payments", None) not in ("active", "pending")
+    needs_transfers = getattr(caps, "transfers", None) not in ("active", "pending")
     if needs_card or needs_transfers:
         stripe.Account.modify(
             acct_id,
@@ -56,9 +58,6 @@ def _ensure_account_id_for(user):
 @connect_bp.get("/api/connect/health")
 def connect_health():
     """Ping Stripe for a specific connected account and report readiness."""
-    import stripe, os
-    stripe.api_key = os.getenv("STRIPE_SECRET_KEY")  # platform key
-
     acct_id = request.args.get("acct")
     if not acct_id:
         return jsonify({"ok": False, "error": "Missing ?acct=acct_..." }), 400
@@ -74,8 +73,8 @@ def connect_health():
             "payouts_enabled": bool(acct.payouts_enabled),
             "details_submitted": bool(getattr(acct, "details_submitted", False)),
             "capabilities": {
-                "card_payments": caps.get("card_payments"),
-                "transfers": caps.get("transfers"),
+                "card_payments": getattr(caps, "card_payments", None),
+                "transfers": getattr(caps, "transfers", None),
             },
             "currently_due": (getattr(getattr(acct, "requirements", None), "currently_due", None) or []),
         }
@@ -98,10 +97,10 @@ def create_account():
         return jsonify({"account_id": account_id, "url": link.url}), 200
     except stripe.error.StripeError as e:
         msg = getattr(e, "user_message", None) or str(e)
-        print(f"[StripeError] {e}")
+        log.warning("Stripe rejected account onboarding: %s", e, extra={"category": "connect.stripe_error", "user_id": current_user.id})
         return jsonify({"error": msg}), 400
     except Exception as e:
-        print(f"[ConnectError] {e}")
+        log.exception("Account onboarding failed", extra={"category": "connect.error", "user_id": current_user.id})
         return jsonify({"error": str(e)}), 500
 
 
@@ -118,8 +117,8 @@ def reauth():
             type="account_onboarding",
         )
         return redirect(link.url)
-    except Exception as e:
-        print(f"[ConnectReauthError] {e}")
+    except Exception:
+        log.exception("Onboarding reauth failed", extra={"category": "connect.reauth_error", "user_id": current_user.id})
         return redirect("/payouts")
 
 
@@ -136,9 +135,9 @@ def connect_return():
         if hasattr(current_user, "stripe_account_id") and not current_user.stripe_account_id:
             current_user.stripe_account_id = acct.id
         if hasattr(current_user, "charges_enabled"):
-            current_user.charges_enabled = bool(acct.get("charges_enabled"))
+            current_user.charges_enabled = bool(getattr(acct, "charges_enabled", False))
         if hasattr(current_user, "details_submitted"):
-            current_user.details_submitted = bool(acct.get("details_submitted"))
+            current_user.details_submitted = bool(getattr(acct, "details_submitted", False))
         db.session.commit()
     except Exception:
         db.session.rollback()
@@ -153,7 +152,7 @@ def express_dashboard():
         login_link = stripe.Account.create_login_link(account_id)
         return jsonify({"url": login_link.url}), 200
     except Exception as e:
-        print(f"[DashboardLinkError] {e}")
+        log.exception("Express dashboard link failed", extra={"category": "connect.dashboard_error", "user_id": current_user.id})
         return jsonify({"error": str(e)}), 400
 
 @connect_bp.get("/api/connect/status")
@@ -170,19 +169,19 @@ def connect_status():
         # Optionally double-check with Stripe to be extra sure:
         if not (charges_ok and details_ok):
             acct = stripe.Account.retrieve(acct_id)
-            charges_ok = bool(acct.get("charges_enabled"))
-            details_ok = bool(acct.get("details_submitted"))
+            charges_ok = bool(getattr(acct, "charges_enabled", False))
+            details_ok = bool(getattr(acct, "details_submitted", False))
 
         return jsonify({
             "ready": charges_ok and details_ok,
             "charges_enabled": charges_ok,
             "details_submitted": details_ok
         }), 200
-    except Exception as e:
-        print(f"[ConnectStatusError] {e}")
+    except Exception:
+        log.exception("Connect status check failed", extra={"category": "connect.status_error", "user_id": current_user.id})
         return jsonify({"ready": False, "error": "status_check_failed"}), 200
 
-# Webhook (optional) to monitor account updates
+# Webhook: account updates + checkout session completed/expired
 @connect_bp.post("/stripe/webhook")
 def stripe_webhook():
     payload = request.data
@@ -193,8 +192,16 @@ def stripe_webhook():
     except Exception:
         return "Invalid", 400
 
-    if event.get("type") == "account.updated":
+    # Subscript/getattr: StripeObject has no .get() in current stripe-python
+    if event["type"] == "account.updated":
         acct = event["data"]["object"]
-        print(f"[Webhook] account.updated {acct.get('id')} charges_enabled={acct.get('charges_enabled')}")
+        log.info("account.updated", extra={"category": "webhook.account_updated", "account_id": acct["id"], "charges_enabled": getattr(acct, "charges_enabled", None)})
+
+    # Kiosks rotate to the next QR once their session is paid or expires (see kiosk.py)
+    elif event["type"] in ("checkout.session.completed", "checkout.session.expired"):
+        sess = event["data"]["object"]
+        status = "complete" if event["type"] == "checkout.session.completed" else "expired"
+        updated = mark_session_status(sess["id"], status)
+        log.info(event["type"], extra={"category": "webhook.checkout_session", "session_id": sess["id"], "status": status, "tracked": updated})
 
     return "", 200
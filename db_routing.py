@@ -0,0 +1,81 @@
+# db_routing.py
+# Send read-only request traffic to Postgres read replicas, everything else to
+# the primary.
+#
+# A session reads from one replica when all of these hold:
+#   - SQLALCHEMY_REPLICA_URIS lists at least one replica
+#   - we're inside a GET/HEAD request
+#   - the session hasn't written anything yet in this transaction
+#   - the browser hasn't written within READ_YOUR_WRITES_SECONDS (session cookie)
+# Anything else (POSTs, flushes, SELECT ... FOR UPDATE, CLI jobs) uses the primary.
+import random
+import time
+
+import sqlalchemy as sa
+from flask import current_app, has_request_context, request, session as flask_session
+from flask_sqlalchemy.session import Session as FlaskSQLAlchemySession
+
+REPLICA_BIND_PREFIX = "replica_"
+_STICKY_KEY = "_rw_until"
+_READ_METHODS = ("GET", "HEAD")
+
+
+def configure_replicas(app):
+    """Turn SQLALCHEMY_REPLICA_URIS into extra binds so Flask-SQLAlchemy owns their engines."""
+    uris = app.config.get("SQLALCHEMY_REPLICA_URIS") or []
+    if isinstance(uris, str):
+        uris = [u.strip() for u in uris.split(",") if u.strip()]
+    binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+    for i, uri in enumerate(uris):
+        binds[f"{REPLICA_BIND_PREFIX}{i}"] = uri
+    app.config["SQLALCHEMY_BINDS"] = binds
+    app.config["SQLALCHEMY_REPLICA_URIS"] = uris
+
+
+class RoutingSession(FlaskSQLAlchemySession):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or engine is not self._db.engines.get(None):
+            return engine  # explicit bind or a model with its own __bind_key__
+        if self._flushing or self.info.get("wrote"):
+            return engine
+        replica = self._pick_replica()
+        if replica is None or not self._read_only_context(clause):
+            return engine
+        return replica
+
+    def _read_only_context(self, clause):
+        if not has_request_context() or request.method not in _READ_METHODS:
+            return False
+        if isinstance(clause, sa.sql.dml.UpdateBase):
+            return False
+        if getattr(clause, "_for_update_arg", None) is not None:
+            return False
+        return flask_session.get(_STICKY_KEY, 0) < time.time()
+
+    def _pick_replica(self):
+        # One replica per session, so a request never sees two different lag points
+        if "replica" not in self.info:
+            names = [k for k in self._db.engines if k and k.startswith(REPLICA_BIND_PREFIX)]
+            self.info["replica"] = random.choice(names) if names else None
+        name = self.info["replica"]
+        return self._db.engines[name] if name else None
+
+
+@sa.event.listens_for(RoutingSession, "before_flush")
+def _mark_wrote(session, flush_context, instances):
+    if session.new or session.dirty or session.deleted:
+        session.info["wrote"] = True
+
+@sa.event.listens_for(RoutingSession, "after_commit")
+def _after_commit(session):
+    if session.info.pop("wrote", False) and has_request_context():
+        window = current_app.config.get("READ_YOUR_WRITES_SECONDS", 5)
+        if window and current_app.config.get("SQLALCHEMY_REPLICA_URIS"):
+            flask_session[_STICKY_KEY] = time.time() + window
+    session.info.pop("replica", None)
+
+@sa.event.listens_for(RoutingSession, "after_soft_rollback")
+def _after_rollback(session, previous_transaction):
+    session.info.pop("wrote", None)
+    session.info.pop("replica", None)
@@ -0,0 +1,13 @@
+# extensions.py
+# Extension objects live here unbound; create_app() in app.py binds them.
+from flask_bcrypt import Bcrypt
+from flask_login import LoginManager
+from flask_wtf import CSRFProtect
+
+from models import db  # noqa: F401  (re-exported so callers have one place to import from)
+
+bcrypt = Bcrypt()
+csrf = CSRFProtect()
+
+login_manager = LoginManager()
+login_manager.login_view = 'main.login'
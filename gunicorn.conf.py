@@ -0,0 +1,48 @@
+# gunicorn.conf.py — run with: gunicorn -c gunicorn.conf.py
+import gc
+import os
+import shutil
+
+# Per-worker metric files, merged by /metrics (see metrics.py). Must exist
+# before prometheus_client is imported, i.e. before preload_app loads the app,
+# so it's set up here rather than in a server hook. Stale files from a previous
+# run would be summed into the new one, so start empty.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/teameventlock-metrics")
+shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+wsgi_app = "app:create_app()"
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", 3))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 60))
+# Threaded workers: an open /kiosk/stream holds one thread for KIOSK_STREAM_SECONDS,
+# not a whole worker, so a few door tablets can't starve the site
+worker_class = "gthread"
+threads = max(2, int(os.getenv("GUNICORN_THREADS", 8)))
+
+# Build the app once in the master; forked workers share its memory copy-on-write
+# and a respawned worker skips the import/setup cost entirely.
+preload_app = True
+
+
+def when_ready(server):
+    # Runs in the master before the first fork: pull in the lazily-imported
+    # modules now so every worker inherits them instead of importing its own copy.
+    import lazy_imports
+    lazy_imports.warm()
+    # Keep the GC from touching (and so un-sharing) everything loaded so far
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Never reuse a DB socket the master may have opened
+    from extensions import db
+    app = server.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():  # primary + any read replicas
+            engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,125 @@
+# http_cache.py
+# Fewer bytes to phones on venue cellular.
+#
+#   - init_app(): gzip (or brotli, if the `brotli` package is installed) for
+#     text responses over COMPRESS_MIN_SIZE, negotiated on Accept-Encoding
+#   - @cache_policy(...): per-route Cache-Control, plus a weak ETag and 304
+#     handling on GET/HEAD so an unchanged page costs headers only. Pages that
+#     embed csrf_token() change every second; give those etag=False.
+#   - public pages skip the session cookie (see skip_session)
+#
+# ETags are weak on purpose: the same page gzipped or brotli'd is still "the
+# same" page, so a validator from one encoding matches the other.
+import gzip
+from functools import wraps
+
+from flask import current_app, g, make_response, request
+from flask.sessions import SecureCookieSessionInterface
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+COMPRESSIBLE = {
+    "text/html", "text/css", "text/plain", "text/csv",
+    "application/json", "application/javascript", "image/svg+xml",
+}
+_SKIP_SESSION = "skip_session"
+
+
+# ------------------ Session cookie ------------------
+class _SessionInterface(SecureCookieSessionInterface):
+    """
+    Flask-Login peeks at the session on every response, which makes Flask add
+    `Vary: Cookie` (one cache entry per visitor). Responses that are the same for
+    everyone don't save the session or vary on it.
+    """
+    def save_session(self, app, session, response):
+        if g.get(_SKIP_SESSION):
+            return
+        super().save_session(app, session, response)
+
+def skip_session():
+    """This response is the same for every visitor: no Set-Cookie, no Vary: Cookie."""
+    g.setdefault(_SKIP_SESSION, True)
+
+
+# ------------------ Cache-Control / ETags ------------------
+
+
+def cache_policy(max_age=0, public=False, no_store=False, s_maxage=None, etag=True):
+    """
+    Cache-Control for one route. Defaults to `private, no-cache`: the browser
+    may keep the page but must revalidate, which the ETag makes cheap.
+
+        @cache_policy(public=True, max_age=300)
+        def success(): ...
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            resp = make_response(view(*args, **kwargs))
+            if request.method not in ("GET", "HEAD") or resp.status_code != 200:
+                return resp
+            if no_store:
+                resp.headers["Cache-Control"] = "no-store"
+                return resp
+
+            cc = resp.cache_control
+            if public:
+                cc.public = True
+                skip_session()
+            else:
+                cc.private = True
+            if max_age:
+                cc.max_age = max_age
+            else:
+                cc.no_cache = True
+            if s_maxage is not None:
+                cc.s_maxage = s_maxage
+
+            if etag and not resp.is_streamed and not resp.direct_passthrough:
+                resp.add_etag(weak=True)
+                resp.make_conditional(request)
+            return resp
+        return wrapped
+    return decorator
+
+
+def _pick_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+def compress_response(response):
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.is_streamed or response.direct_passthrough
+            or response.mimetype not in COMPRESSIBLE
+            or "Content-Encoding" in response.headers
+            or request.method == "HEAD"):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    if len(data) < current_app.config.get("COMPRESS_MIN_SIZE", 1024):
+        return response
+    encoding = _pick_encoding()
+    if encoding is None:
+        return response
+
+    if encoding == "br":
+        body = brotli.compress(data, quality=current_app.config.get("COMPRESS_BR_QUALITY", 5))
+    else:
+        body = gzip.compress(data, compresslevel=current_app.config.get("COMPRESS_GZIP_LEVEL", 6), mtime=0)
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def init_app(app):
+    app.session_interface = _SessionInterface()
+    app.after_request(compress_response)
@@ -0,0 +1,127 @@
+# kiosk.py
+# Door-tablet mode: one long-lived page that shows a QR for a fixed cart and
+# swaps in the next one as soon as the current session is paid or expires.
+#
+#   GET /kiosk?items=7x2,9x1     the page (one <img>, nothing else changes)
+#   GET /kiosk/stream?items=...  server-sent events:
+#       event: qr       {"session_id", "img", "total", "name"}   (id: = session id)
+#       event: complete / expired  {"session_id"}
+#
+# "complete"/"expired" come from the Stripe webhook (connect_routes.py), which
+# updates checkout_session; the stream just polls that row. Each stream ends
+# after KIOSK_STREAM_SECONDS (under the gunicorn timeout) and EventSource
+# reconnects with Last-Event-ID, so an open session carries over untouched.
+# Every kiosk on the same cart moves on to the same next session.
+import json
+import logging
+import math
+import time
+from urllib.parse import quote_plus
+
+from flask import Blueprint, Response, abort, current_app, redirect, render_template, request, stream_with_context, url_for
+from flask_login import current_user, login_required
+
+from checkout import (
+    DONE_STATUSES, CheckoutRateLimited, cart_from_form, cart_from_signature, checkout_for_cart, render_qr_png_b64,
+    session_status,
+)
+from models import db
+from pricing import cart_signature, quote_cart
+from queries import tickets_for_user
+
+log = logging.getLogger(__name__)
+kiosk_bp = Blueprint("kiosk", __name__)
+
+HEARTBEAT_SECONDS = 15  # keep proxies from closing an idle stream
+
+
+def _load_cart(raw_items):
+    wanted = cart_from_signature(raw_items)
+    if not wanted:
+        abort(400)
+    tickets = tickets_for_user(current_user.id, ids=wanted)
+    if len(tickets) != len(wanted):
+        abort(404)
+    return quote_cart([(t, wanted[t.id]) for t in tickets], current_user)
+
+def _sse(event, data, event_id=None):
+    head = f"id: {event_id}\n" if event_id else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@kiosk_bp.get("/kiosk")
+@login_required
+def kiosk():
+    if "items" not in request.args:
+        # Coming from the cart form on / (qty_<id> fields): canonicalize the URL
+        wanted = cart_from_form(request.args)
+        if not wanted:
+            return redirect(url_for("main.index"))
+        return redirect(url_for("kiosk.kiosk", items=cart_signature(wanted.items())))
+    cart = _load_cart(request.args["items"])
+    return render_template("kiosk.html", cart=cart, cart_name=cart.describe(),
+                           stream_url=url_for("kiosk.stream", items=cart.signature))
+
+
+@kiosk_bp.get("/kiosk/stream")
+@login_required
+def stream():
+    cart = _load_cart(request.args.get("items"))
+    user = current_user._get_current_object()
+    cfg = current_app.config
+    success_url = (
+        "https://teameventlock.com/success"
+        f"?ticket={quote_plus(cart.describe())}&price={cart.total_price:.2f}"
+    )
+    cancel_url = url_for("kiosk.kiosk", items=cart.signature, _external=True)
+    last_id = request.headers.get("Last-Event-ID")
+    payload = {"total": f"{cart.total_price:.2f}", "name": cart.describe()}
+
+    def events():
+        # Nothing below uses the ORM session; don't hold its connection for the whole stream
+        db.session.close()
+        deadline = time.monotonic() + cfg.get("KIOSK_STREAM_SECONDS", 50)
+        poll = cfg.get("KIOSK_POLL_INTERVAL", 1.0)
+        yield "retry: 1000\n\n"
+
+        current, after = None, None
+        if last_id:
+            status = session_status(last_id)
+            if status in DONE_STATUSES:
+                after = last_id
+            elif status is not None:
+                current = last_id  # still showing on the tablet; keep it
+        last_beat = time.monotonic()
+
+        while time.monotonic() < deadline:
+            if current is None:
+                try:
+                    co = checkout_for_cart(user, cart, success_url, cancel_url, after=after,
+                                           expires_in=cfg.get("KIOSK_SESSION_TTL", 1800), kiosk=True)
+                    img = co.qr_png_b64 or render_qr_png_b64(co.url)
+                except CheckoutRateLimited as e:
+                    yield _sse("wait", {"retry_after": math.ceil(e.retry_after)})
+                    time.sleep(min(e.retry_after, max(deadline - time.monotonic(), 0)))
+                    continue
+                except Exception:
+                    log.exception("kiosk checkout failed", extra={"category": "kiosk.error", "user_id": user.id, "items": cart.signature})
+                    yield _sse("error", {"message": "Couldn’t start checkout, retrying…"})
+                    return  # EventSource reconnects after `retry`
+                current = co.session_id
+                log.info("kiosk qr", extra={"category": "kiosk.qr", "session_id": current, "reused": co.reused})
+                yield _sse("qr", {"session_id": current, "img": img, **payload}, event_id=current)
+                last_beat = time.monotonic()
+
+            time.sleep(poll)
+            status = session_status(current)
+            if status in DONE_STATUSES:
+                yield _sse(status, {"session_id": current})
+                after, current = current, None
+            elif time.monotonic() - last_beat >= HEARTBEAT_SECONDS:
+                yield ": ping\n\n"
+                last_beat = time.monotonic()
+
+    resp = Response(stream_with_context(events()), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-store"
+    resp.headers["X-Accel-Buffering"] = "no"  # nginx: pass events straight through
+    return resp
@@ -0,0 +1,62 @@
+# lazy_imports.py
+# Heavy third-party modules, imported on first attribute access instead of at boot.
+#
+#   from lazy_imports import stripe, qrcode
+#   stripe.checkout.Session.create(...)   # real import happens here, once
+#
+# Under `gunicorn --preload` the master calls warm() so workers inherit the
+# already-imported modules copy-on-write instead of each importing them.
+import importlib
+import os
+import threading
+
+
+class LazyModule:
+    def __init__(self, name, on_load=None):
+        self._name = name
+        self._on_load = on_load
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    module = importlib.import_module(self._name)
+                    if self._on_load:
+                        self._on_load(module)
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        if attr.startswith("_"):
+            object.__setattr__(self, attr, value)
+        else:
+            setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def _configure_stripe(module):
+    module.api_key = os.getenv("STRIPE_SECRET_KEY")
+    from metrics import instrument_stripe
+    instrument_stripe(module)
+
+stripe = LazyModule("stripe", on_load=_configure_stripe)
+qrcode = LazyModule("qrcode")
+
+# Imported with `from x import y` inside the functions that need them
+_WARM = ("flask_mail", "pytz", "itsdangerous")
+
+
+def warm():
+    """Import everything now (gunicorn master with --preload)."""
+    stripe._load()
+    qrcode.make("warm")  # also pulls in whichever image backend qrcode picks
+    for name in _WARM:
+        importlib.import_module(name)
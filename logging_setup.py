@@ -0,0 +1,164 @@
+# logging_setup.py
+# JSON logs that never make a request thread wait on stdout.
+#
+# Request threads only put records on an in-memory queue; a listener thread in
+# each worker formats them and writes to stdout. Every record carries the
+# request id, and high-volume categories can be sampled:
+#
+#   log.info("checkout session reused", extra={"category": "checkout.reused", "session_id": sid})
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+
+# Attributes every LogRecord has; anything else came in via `extra=` and is emitted as a field
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        out = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "pid": record.process,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                out[key] = value
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp the current request id on every record."""
+    def filter(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = g.get("request_id") if has_request_context() else None
+        return True
+
+
+class CategorySampler(logging.Filter):
+    """Keep roughly `rate` of INFO/DEBUG records per category; warnings and up always pass."""
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = dict(rates)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, "category", None))
+        if rate is None or rate >= 1:
+            return True
+        if random.random() < rate:
+            record.sample_rate = rate
+            return True
+        return False
+
+
+class ForkSafeQueueHandler(QueueHandler):
+    """
+    QueueHandler whose listener thread belongs to the current process. Threads
+    don't survive fork, so a gunicorn worker starts its own listener on first use.
+    """
+    def __init__(self, target, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.target = target
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._pid = None
+        self._listener = None
+        self._start_lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        self._start_lock = threading.Lock()
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self.queue = queue.Queue(self.maxsize)
+            self._listener = QueueListener(self.queue, self.target, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1  # never block a request on logging
+
+    def prepare(self, record):
+        # Same process, so no pickling: just freeze the message and traceback text
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        self._ensure_listener()
+        super().emit(record)
+
+    def stop(self):
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+            self._pid = None
+
+
+def parse_sample_rates(raw):
+    """'checkout.reused=0.1,connect.status=0.25' -> {'checkout.reused': 0.1, ...}"""
+    rates = {}
+    for part in (raw or "").split(","):
+        name, _, value = part.partition("=")
+        if name.strip() and value.strip():
+            rates[name.strip()] = float(value)
+    return rates
+
+
+_handler = None
+
+def init_app(app):
+    global _handler
+    if _handler is None:
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(JsonFormatter() if app.config.get("LOG_JSON", True)
+                            else logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(request_id)s %(message)s"))
+        _handler = ForkSafeQueueHandler(stream)
+        _handler.addFilter(RequestContextFilter())
+        _handler.addFilter(CategorySampler(parse_sample_rates(app.config.get("LOG_SAMPLE_RATES"))))
+
+        root = logging.getLogger()
+        root.addHandler(_handler)
+        root.setLevel(app.config.get("LOG_LEVEL", "INFO"))
+        atexit.register(_handler.stop)
+
+    @app.before_request
+    def _assign_request_id():
+        g.request_id = (request.headers.get("X-Request-ID") or uuid.uuid4().hex)[:64]
+
+    @app.after_request
+    def _echo_request_id(response):
+        if g.get("request_id"):
+            response.headers["X-Request-ID"] = g.request_id
+        return response
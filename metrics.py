@@ -0,0 +1,129 @@
+# metrics.py
+# Prometheus metrics, summed across gunicorn workers.
+#
+# With PROMETHEUS_MULTIPROC_DIR set (gunicorn.conf.py does this) every worker
+# writes its samples to that directory and /metrics merges them; without it
+# (flask run, tests) the default in-process registry is used.
+import os
+import re
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from flask import Blueprint, Response, current_app, g, request, abort
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess,
+)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by endpoint",
+    ["endpoint", "method"],
+)
+REQUEST_COUNT = Counter(
+    "http_requests_total", "Requests by endpoint and status",
+    ["endpoint", "method", "status"],
+)
+STRIPE_LATENCY = Histogram(
+    "stripe_request_duration_seconds", "Stripe API call latency",
+    ["method", "path"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 0.75, 1, 1.5, 2.5, 5, 10, 30),
+)
+STRIPE_ERRORS = Counter(
+    "stripe_request_errors_total", "Stripe API calls that failed (HTTP >= 400 or no response)",
+    ["method", "path", "kind"],
+)
+QR_RENDER = Histogram(
+    "qr_render_duration_seconds", "Time to render a checkout QR code to PNG",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5),
+)
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "DB connections in use", multiprocess_mode="livesum")
+DB_POOL_SIZE = Gauge("db_pool_size", "DB pool size", multiprocess_mode="livesum")
+DB_POOL_OVERFLOW = Gauge("db_pool_overflow", "DB connections opened beyond the pool size", multiprocess_mode="livesum")
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+# ------------------ Stripe ------------------
+_STRIPE_ID = re.compile(r"^[a-z]+_[A-Za-z0-9_]+$")
+
+def _stripe_path(url):
+    """/v1/accounts/acct_123/login_links -> /v1/accounts/{id}/login_links (bounded label set)."""
+    parts = urlparse(url).path.split("/")
+    return "/".join("{id}" if _STRIPE_ID.match(p) else p for p in parts)
+
+def instrument_stripe(stripe_module):
+    """Route every Stripe API call through a timed HTTP client."""
+    base = getattr(stripe_module, "RequestsClient", None) or stripe_module.http_client.RequestsClient
+
+    class TimedRequestsClient(base):
+        def request(self, method, url, headers, post_data=None):
+            path = _stripe_path(url)
+            start = time.perf_counter()
+            try:
+                content, status, resp_headers = super().request(method, url, headers, post_data)
+            except Exception as e:
+                STRIPE_ERRORS.labels(method, path, type(e).__name__).inc()
+                raise
+            finally:
+                STRIPE_LATENCY.labels(method, path).observe(time.perf_counter() - start)
+            if status >= 400:
+                STRIPE_ERRORS.labels(method, path, str(status)).inc()
+            return content, status, resp_headers
+
+    stripe_module.default_http_client = TimedRequestsClient()
+
+
+@contextmanager
+def qr_render_timer():
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        QR_RENDER.observe(time.perf_counter() - start)
+
+
+# ------------------ Requests + DB pool ------------------
+def _record_pool():
+    from extensions import db
+    pool = db.engine.pool
+    for gauge, attr in ((DB_POOL_CHECKED_OUT, "checkedout"), (DB_POOL_SIZE, "size"), (DB_POOL_OVERFLOW, "overflow")):
+        fn = getattr(pool, attr, None)
+        if fn is not None:
+            gauge.set(max(fn(), 0))
+
+def _start_timer():
+    g._metrics_start = time.perf_counter()
+
+def _observe(response):
+    start = g.pop("_metrics_start", None)
+    if start is None:
+        return response
+    endpoint = request.endpoint or "unmatched"
+    if endpoint == "metrics.metrics":
+        return response
+    REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - start)
+    REQUEST_COUNT.labels(endpoint, request.method, str(response.status_code)).inc()
+    try:
+        _record_pool()
+    except Exception:
+        pass
+    return response
+
+def init_app(app):
+    app.before_request(_start_timer)
+    app.after_request(_observe)
+    app.register_blueprint(metrics_bp)
+
+
+@metrics_bp.get("/metrics")
+def metrics():
+    token = current_app.config.get("METRICS_TOKEN")
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        abort(401)
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
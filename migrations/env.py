@@ -93,6 +93,9 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    # migrations/online.py commits mid-migration (autocommit blocks), so give
+    # each revision its own transaction and keep alembic_version in step
+    conf_args.setdefault("transaction_per_migration", True)
 
     connectable = get_engine()
 
@@ -0,0 +1,110 @@
+"""Online (no-downtime) schema change helpers for migration scripts.
+
+`op.batch_alter_table` rebuilds the whole table on SQLite, and on Postgres a
+backfill inside the migration transaction holds its locks until the very end.
+Use these instead when a table is big or live:
+
+    from migrations import online
+
+    def upgrade():
+        online.add_column('ticket', sa.Column('currency', sa.String(3), nullable=True))
+        online.create_index('ix_ticket_currency', 'ticket', ['currency'])
+        online.backfill('ticket', {'currency': 'usd'}, where=sa.text('currency IS NULL'))
+
+- add_column: plain ALTER TABLE ADD COLUMN (no table copy), with a short
+  lock_timeout on Postgres so it fails fast instead of queueing behind a
+  long transaction and blocking everyone else.
+- create_index / drop_index: CONCURRENTLY on Postgres, outside the migration
+  transaction (Postgres refuses to do it inside one).
+- backfill: commits every `batch_size` rows, walking the primary key, with a
+  pause between batches. It only touches rows still matching `where`, so if
+  it's interrupted, running the migration again carries on where it stopped.
+
+Anything run in an autocommit block commits on its own, so keep these steps
+idempotent (the helpers use IF NOT EXISTS where the database supports it).
+"""
+import logging
+import time
+
+import sqlalchemy as sa
+from alembic import op
+
+log = logging.getLogger("alembic.online")
+
+DEFAULT_LOCK_TIMEOUT = "3s"
+
+
+def _dialect():
+    return op.get_bind().dialect.name
+
+
+def _set_lock_timeout(timeout):
+    if _dialect() == "postgresql" and timeout:
+        op.execute(sa.text(f"SET LOCAL lock_timeout = '{timeout}'"))
+
+
+def add_column(table, column, lock_timeout=DEFAULT_LOCK_TIMEOUT):
+    """
+    Add a column without rewriting the table. Keep it nullable (or give it a
+    constant server_default) and backfill afterwards; a volatile default would
+    make Postgres rewrite every row.
+    """
+    existing = {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+    if column.name in existing:
+        log.info("online: %s.%s already exists", table, column.name)
+        return
+    _set_lock_timeout(lock_timeout)
+    op.add_column(table, column)
+
+
+def create_index(name, table, columns, unique=False, **kw):
+    """CREATE INDEX CONCURRENTLY on Postgres; a normal CREATE INDEX elsewhere."""
+    if _dialect() == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(name, table, columns, unique=unique,
+                            postgresql_concurrently=True, if_not_exists=True, **kw)
+    else:
+        op.create_index(name, table, columns, unique=unique, if_not_exists=True, **kw)
+
+
+def drop_index(name, table):
+    if _dialect() == "postgresql":
+        with op.get_context().autocommit_block():
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        op.drop_index(name, table_name=table, if_exists=True)
+
+
+def backfill(table, values, where, batch_size=1000, pause=0.05, key="id"):
+    """
+    UPDATE `table` SET `values` for rows matching `where`, `batch_size` rows per
+    committed transaction, walking `key` upwards and sleeping `pause` seconds
+    between batches so replicas and live traffic keep up.
+
+    `where` must stop matching once a row is done (e.g. "col IS NULL"); that
+    is what makes a rerun pick up only the rows that are left.
+    Returns the number of rows updated.
+    """
+    tbl = sa.Table(table, sa.MetaData(), autoload_with=op.get_bind())
+    pk = tbl.c[key]
+    where = sa.text(where) if isinstance(where, str) else where
+
+    total, last = 0, None
+    started = time.monotonic()
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()  # now in autocommit: each UPDATE below commits by itself
+        while True:
+            q = sa.select(pk).where(where).order_by(pk).limit(batch_size)
+            if last is not None:
+                q = q.where(pk > last)
+            ids = bind.execute(q).scalars().all()
+            if not ids:
+                break
+            bind.execute(tbl.update().where(pk.in_(ids)).where(where).values(values))
+            total += len(ids)
+            last = ids[-1]
+            log.info("online: backfilled %d rows of %s (up to %s=%s)", total, table, key, last)
+            if pause:
+                time.sleep(pause)
+    log.info("online: backfill of %s done, %d rows in %.1fs", table, total, time.monotonic() - started)
+    return total
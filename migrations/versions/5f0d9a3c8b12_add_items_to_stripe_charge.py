@@ -0,0 +1,28 @@
+"""add items to stripe_charge
+
+Revision ID: 5f0d9a3c8b12
+Revises: e3b8c4d17a60
+Create Date: 2025-08-27 16:05:48.221390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations import online
+
+
+# revision identifiers, used by Alembic.
+revision = '5f0d9a3c8b12'
+down_revision = 'e3b8c4d17a60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nullable, no default: metadata-only change, no table rewrite
+    online.add_column('stripe_charge', sa.Column('items', sa.String(length=500), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('stripe_charge', schema=None) as batch_op:
+        batch_op.drop_column('items')
@@ -0,0 +1,30 @@
+"""add user storefront_slug
+
+Revision ID: 9b1e6f2c4d73
+Revises: 5f0d9a3c8b12
+Create Date: 2025-08-29 11:20:37.804512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations import online
+
+
+# revision identifiers, used by Alembic.
+revision = '9b1e6f2c4d73'
+down_revision = '5f0d9a3c8b12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Null = no public event page; nullable, no default: metadata-only change
+    online.add_column('user', sa.Column('storefront_slug', sa.String(length=32), nullable=True))
+    online.create_index('ix_user_storefront_slug', 'user', ['storefront_slug'], unique=True)
+
+
+def downgrade():
+    online.drop_index('ix_user_storefront_slug', 'user')
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('storefront_slug')
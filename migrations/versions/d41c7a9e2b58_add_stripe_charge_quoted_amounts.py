@@ -0,0 +1,30 @@
+"""add stripe_charge quoted_total_cents, quoted_fee_cents
+
+Revision ID: d41c7a9e2b58
+Revises: 9b1e6f2c4d73
+Create Date: 2025-08-30 09:12:44.218305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations import online
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41c7a9e2b58'
+down_revision = '9b1e6f2c4d73'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Null = charge predates the quote in metadata (reconcile re-prices those)
+    online.add_column('stripe_charge', sa.Column('quoted_total_cents', sa.Integer(), nullable=True))
+    online.add_column('stripe_charge', sa.Column('quoted_fee_cents', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('stripe_charge', schema=None) as batch_op:
+        batch_op.drop_column('quoted_fee_cents')
+        batch_op.drop_column('quoted_total_cents')
@@ -0,0 +1,24 @@
+"""add ticket (user_id, id) index
+
+Revision ID: e3b8c4d17a60
+Revises: a52d7e1c9f04
+Create Date: 2025-08-26 10:41:12.503118
+
+"""
+from migrations import online
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b8c4d17a60'
+down_revision = 'a52d7e1c9f04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CONCURRENTLY on Postgres so ticket writes aren't blocked while it builds
+    online.create_index('ix_ticket_user_id_id', 'ticket', ['user_id', 'id'])
+
+
+def downgrade():
+    online.drop_index('ix_ticket_user_id_id', 'ticket')
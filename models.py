@@ -2,9 +2,16 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime
+from sqlalchemy import event, inspect
 
+from db_routing import RoutingSession
 
-db = SQLAlchemy()
+
+# Reads in GET requests may go to a replica; see db_routing.py.
+# expire_on_commit=False: sessions are request-scoped, and reloading every object
+# after each commit just to redirect was pure overhead. Values changed behind the
+# ORM's back (e.g. ticket_version below) are expired explicitly.
+db = SQLAlchemy(session_options={"class_": RoutingSession, "expire_on_commit": False})
 
 class User(db.Model, UserMixin):
     __tablename__ = "user"
@@ -25,6 +32,12 @@ class User(db.Model, UserMixin):
         return self.email_confirmed_at is not None
     fee_percent = db.Column(db.Float, nullable=False, server_default="12.0")
 
+    # Bumped whenever this user's tickets (or their pricing) change; drives API ETags
+    ticket_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    # Public event page at /e/<slug> (storefront.py); null until the organizer publishes it
+    storefront_slug = db.Column(db.String(32), unique=True, index=True, nullable=True)
+
     def __repr__(self):
         return f"<User {self.email}>"
 
@@ -40,5 +53,133 @@ class Ticket(db.Model):
 
     user = db.relationship("User", backref="tickets")
 
+    # Per-organizer listings page through tickets by id (dashboard, /api/tickets)
+    __table_args__ = (db.Index("ix_ticket_user_id_id", "user_id", "id"),)
+
     def __repr__(self):
         return f"<Ticket {self.name} - ${self.price:.2f}>"
+
+# ------------------ Stripe reconciliation mirror ------------------
+# Local copies of Stripe objects, written by `flask reconcile-stripe`.
+
+class StripeSyncCursor(db.Model):
+    __tablename__ = "stripe_sync_cursor"
+    id = db.Column(db.Integer, primary_key=True)
+    account_id = db.Column(db.String(64), nullable=False)  # acct_... or "platform"
+    resource = db.Column(db.String(32), nullable=False)    # balance_transaction / charge / application_fee
+    last_created = db.Column(db.Integer, nullable=False, default=0)  # unix ts of newest object seen
+    synced_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (db.UniqueConstraint("account_id", "resource", name="uq_stripe_sync_cursor_account_resource"),)
+
+    def __repr__(self):
+        return f"<StripeSyncCursor {self.account_id}/{self.resource} @ {self.last_created}>"
+
+class StripeBalanceTransaction(db.Model):
+    __tablename__ = "stripe_balance_transaction"
+    id = db.Column(db.String(64), primary_key=True)  # txn_...
+    account_id = db.Column(db.String(64), nullable=False, index=True)
+    type = db.Column(db.String(32), nullable=False)
+    amount = db.Column(db.Integer, nullable=False)
+    fee = db.Column(db.Integer, nullable=False, default=0)
+    net = db.Column(db.Integer, nullable=False)
+    currency = db.Column(db.String(3), nullable=False)
+    source = db.Column(db.String(64), nullable=True)
+    created = db.Column(db.Integer, nullable=False, index=True)
+
+class StripeCharge(db.Model):
+    __tablename__ = "stripe_charge"
+    id = db.Column(db.String(64), primary_key=True)  # ch_...
+    account_id = db.Column(db.String(64), nullable=False, index=True)  # transfer destination, or "platform"
+    amount = db.Column(db.Integer, nullable=False)
+    amount_refunded = db.Column(db.Integer, nullable=False, default=0)
+    currency = db.Column(db.String(3), nullable=False)
+    status = db.Column(db.String(16), nullable=False)
+    application_fee_amount = db.Column(db.Integer, nullable=True)
+    ticket_id = db.Column(db.Integer, nullable=True, index=True)  # from payment metadata
+    items = db.Column(db.String(500), nullable=True)  # cart metadata, "7x2,9x1" (ticket_id x qty)
+    user_id = db.Column(db.Integer, nullable=True)
+    quoted_total_cents = db.Column(db.Integer, nullable=True)  # metadata: what checkout priced the cart at
+    quoted_fee_cents = db.Column(db.Integer, nullable=True)    # metadata: platform's half of the fee at checkout
+    created = db.Column(db.Integer, nullable=False, index=True)
+
+class StripeApplicationFee(db.Model):
+    __tablename__ = "stripe_application_fee"
+    id = db.Column(db.String(64), primary_key=True)  # fee_...
+    account_id = db.Column(db.String(64), nullable=False, index=True)
+    charge_id = db.Column(db.String(64), nullable=True, index=True)
+    amount = db.Column(db.Integer, nullable=False)
+    amount_refunded = db.Column(db.Integer, nullable=False, default=0)
+    currency = db.Column(db.String(3), nullable=False)
+    created = db.Column(db.Integer, nullable=False, index=True)
+
+# ------------------ Rate limiting ------------------
+# Token buckets shared by every gunicorn worker (see ratelimit.py).
+
+class RateLimitBucket(db.Model):
+    __tablename__ = "rate_limit_bucket"
+    key = db.Column(db.String(64), primary_key=True)  # e.g. "checkout:user:12", "checkout:platform"
+    tokens = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.Float, nullable=False)  # unix time of last refill
+
+    def __repr__(self):
+        return f"<RateLimitBucket {self.key} tokens={self.tokens:.2f}>"
+
+# ------------------ Checkout sessions ------------------
+# One row per Stripe Checkout Session we start. `idem_key` collapses double taps
+# and retries (see checkout.py); the rendered QR is stored so waiters can reuse it.
+
+class CheckoutSession(db.Model):
+    __tablename__ = "checkout_session"
+    id = db.Column(db.Integer, primary_key=True)
+    idem_key = db.Column(db.String(64), unique=True, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
+    ticket_id = db.Column(db.Integer, nullable=True)  # null for multi-tier carts
+    total_cents = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(16), nullable=False, default="pending")  # pending -> open -> complete/expired
+    stripe_session_id = db.Column(db.String(255), unique=True, nullable=True)
+    url = db.Column(db.Text, nullable=True)
+    qr_png_b64 = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.Float, nullable=False)  # unix time
+
+    def __repr__(self):
+        return f"<CheckoutSession {self.stripe_session_id or self.idem_key} {self.status}>"
+
+# ------------------ Ticket version counter ------------------
+# Organizers whose tickets/pricing changed in the current transaction; read by
+# after_commit listeners (storefront.py drops cached pages for them).
+TICKETS_CHANGED = "tickets_changed"
+
+def bump_ticket_version(conn, user_ids, session=None):
+    """One UPDATE for every organizer whose ticket list/pricing just changed."""
+    user_ids = {uid for uid in user_ids if uid is not None}
+    if user_ids:
+        conn.execute(
+            User.__table__.update()
+            .where(User.__table__.c.id.in_(user_ids))
+            .values(ticket_version=User.__table__.c.ticket_version + 1)
+        )
+        if session is not None:
+            session.info.setdefault(TICKETS_CHANGED, set()).update(user_ids)
+    return user_ids
+
+@event.listens_for(RoutingSession, "after_flush")
+def _bump_on_ticket_change(session, flush_context):
+    changed = {t.user_id for t in (*session.new, *session.dirty, *session.deleted) if isinstance(t, Ticket)}
+    for u in session.dirty:
+        if isinstance(u, User) and inspect(u).attrs.fee_percent.history.has_changes():
+            changed.add(u.id)
+    if bump_ticket_version(session.connection(), changed, session):
+        session.info.setdefault("ticket_version_bumped", set()).update(changed)
+
+@event.listens_for(RoutingSession, "after_flush_postexec")
+def _expire_bumped_versions(session, flush_context):
+    # The UPDATE ran behind the ORM's back; make loaded users re-read the counter
+    for uid in session.info.pop("ticket_version_bumped", ()):
+        user = session.identity_map.get(inspect(User).identity_key_from_primary_key((uid,)))
+        if user is not None:
+            session.expire(user, ["ticket_version"])
+
+@event.listens_for(RoutingSession, "after_soft_rollback")
+def _forget_ticket_changes(session, previous_transaction):
+    session.info.pop(TICKETS_CHANGED, None)
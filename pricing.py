@@ -0,0 +1,108 @@
+# pricing.py
+# One place for the fee math, so checkout and reconciliation agree on the numbers.
+from dataclasses import dataclass
+
+DEFAULT_FEE_PERCENT = 12.0
+MIN_FEE_PERCENT = 5.0
+MAX_FEE_PERCENT = 20.0
+
+
+def clamp_fee_percent(pct) -> float:
+    try:
+        pct = float(pct)
+    except (TypeError, ValueError):
+        pct = DEFAULT_FEE_PERCENT
+    return max(MIN_FEE_PERCENT, min(MAX_FEE_PERCENT, pct))
+
+
+@dataclass(frozen=True)
+class Quote:
+    base_price: float
+    fee_percent: float
+    fee_total: float
+    total_price: float
+    total_cents: int
+    platform_fee_cents: int
+
+
+def quote_ticket(ticket, user=None) -> Quote:
+    """Price a single ticket: ticket fee if set, else the organizer's, clamped to 5–20%."""
+    base_price = float(ticket.price)
+    pct = ticket.fee_percent or getattr(user, "fee_percent", DEFAULT_FEE_PERCENT)
+    pct = clamp_fee_percent(pct)
+
+    fee_total = base_price * (pct / 100.0)
+    total_price = base_price + fee_total
+    total_cents = int(round(total_price * 100))
+
+    # Platform keeps half of the fee; never the whole charge
+    platform_fee_cents = int(round((fee_total * 0.5) * 100))
+    platform_fee_cents = min(platform_fee_cents, max(total_cents - 1, 0))
+
+    return Quote(base_price, pct, fee_total, total_price, total_cents, platform_fee_cents)
+
+
+# ------------------ Carts ------------------
+@dataclass(frozen=True)
+class CartLine:
+    ticket: object
+    quantity: int
+    quote: Quote
+
+    @property
+    def total_cents(self) -> int:
+        return self.quote.total_cents * self.quantity
+
+    @property
+    def platform_fee_cents(self) -> int:
+        return self.quote.platform_fee_cents * self.quantity
+
+
+@dataclass(frozen=True)
+class CartQuote:
+    lines: tuple
+    total_cents: int
+    platform_fee_cents: int
+
+    @property
+    def total_price(self) -> float:
+        return self.total_cents / 100.0
+
+    @property
+    def signature(self) -> str:
+        return cart_signature((line.ticket.id, line.quantity) for line in self.lines)
+
+    def describe(self) -> str:
+        """'2 × GA, 1 × VIP' (or just 'GA' for a single ticket)."""
+        if len(self.lines) == 1 and self.lines[0].quantity == 1:
+            return self.lines[0].ticket.name
+        return ", ".join(f"{line.quantity} × {line.ticket.name}" for line in self.lines)
+
+
+def quote_cart(items, user=None) -> CartQuote:
+    """
+    Price several (ticket, quantity) pairs in one pass. Each line is priced
+    exactly like a single ticket, so a cart of one costs the same as before;
+    the platform's half of the fee is summed across lines.
+    """
+    lines = tuple(CartLine(t, int(q), quote_ticket(t, user))
+                  for t, q in sorted(items, key=lambda item: item[0].id) if int(q) > 0)
+    total_cents = sum(line.total_cents for line in lines)
+    platform_fee_cents = sum(line.platform_fee_cents for line in lines)
+    platform_fee_cents = min(platform_fee_cents, max(total_cents - 1, 0))
+    return CartQuote(lines, total_cents, platform_fee_cents)
+
+
+def cart_signature(pairs) -> str:
+    """(ticket_id, qty) pairs -> '7x2,9x1'. Sorted, so the same cart always has the same string."""
+    return ",".join(f"{tid}x{qty}" for tid, qty in sorted(pairs))
+
+def parse_cart_signature(raw):
+    """'7x2,9x1' -> [(7, 2), (9, 1)]; None if it isn't one."""
+    pairs = []
+    for part in (raw or "").split(","):
+        tid, sep, qty = part.strip().partition("x")
+        if not sep or not tid.isdigit() or not qty.isdigit():
+            return None
+        pairs.append((int(tid), int(qty)))
+    return pairs or None
@@ -0,0 +1,34 @@
+# queries.py
+# Read-only lookups for the hot listing paths.
+#
+# These select just the columns a page needs and return SQLAlchemy Row objects
+# (immutable named tuples): no identity map entry, no change tracking, no lazy
+# `Ticket.user` relationship to trip over. Rows quack like the models for
+# everything read-only (t.id, t.name, t.price, t.fee_percent), so pricing and
+# templates take either. Anything that writes still loads the ORM object.
+from sqlalchemy import select
+
+from models import db, Ticket, User
+
+TICKET_COLUMNS = (Ticket.id, Ticket.name, Ticket.price, Ticket.fee_percent, Ticket.user_id)
+MAX_ID = 2**31 - 1  # largest Integer primary key (int4 on Postgres); SQLite overflows past 2**63
+
+
+def tickets_for_user(user_id, ids=None):
+    """An organizer's tickets in id order; `ids` narrows it to those tickets."""
+    stmt = select(*TICKET_COLUMNS).where(Ticket.user_id == user_id).order_by(Ticket.id)
+    if ids is not None:
+        stmt = stmt.where(Ticket.id.in_(list(ids)))
+    return db.session.execute(stmt).all()
+
+def tickets_by_id(ids):
+    """{ticket_id: row} for any organizer's tickets (reconciliation)."""
+    ids = list(ids)
+    if not ids:
+        return {}
+    return {r.id: r for r in db.session.execute(select(*TICKET_COLUMNS).where(Ticket.id.in_(ids)))}
+
+def pricing_accounts():
+    """{user_id: row(id, stripe_account_id, fee_percent)}: what pricing/payout checks read."""
+    stmt = select(User.id, User.stripe_account_id, User.fee_percent)
+    return {r.id: r for r in db.session.execute(stmt)}
@@ -0,0 +1,105 @@
+# ratelimit.py
+# Token buckets kept in the database so every gunicorn worker draws from the same
+# budget. Each take is a single conditional UPDATE (refill + spend in one statement),
+# so concurrent workers can't double-spend a token on SQLite or Postgres.
+import time
+
+from flask import current_app
+from sqlalchemy import case, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db, RateLimitBucket
+
+_bucket = RateLimitBucket.__table__
+
+
+def _insert_for(conn):
+    return (postgresql if conn.dialect.name == "postgresql" else sqlite).insert(_bucket)
+
+def _refilled(capacity, per_sec, now):
+    level = _bucket.c.tokens + (now - _bucket.c.updated_at) * per_sec
+    return case((level > capacity, capacity), else_=level)
+
+def _take(conn, key, capacity, per_sec, now):
+    """Spend one token. Returns 0.0 on success, else seconds until one is available."""
+    level = _refilled(capacity, per_sec, now)
+    res = conn.execute(
+        _bucket.update()
+        .where(_bucket.c.key == key, level >= 1)
+        .values(tokens=level - 1, updated_at=now)
+    )
+    if res.rowcount == 1:
+        return 0.0
+
+    row = conn.execute(select(_bucket.c.tokens, _bucket.c.updated_at).where(_bucket.c.key == key)).first()
+    if row is None:
+        # First use of this bucket: start full, minus the token we're taking
+        ins = _insert_for(conn).values(key=key, tokens=capacity - 1, updated_at=now)
+        if conn.execute(ins.on_conflict_do_nothing(index_elements=["key"])).rowcount == 1:
+            return 0.0
+        return _take(conn, key, capacity, per_sec, now)  # another worker created it first
+
+    tokens = min(capacity, row.tokens + (now - row.updated_at) * per_sec)
+    return max((1 - tokens) / per_sec, 0.001)
+
+def _refund(conn, key, capacity):
+    level = _bucket.c.tokens + 1
+    conn.execute(
+        _bucket.update()
+        .where(_bucket.c.key == key)
+        .values(tokens=case((level > capacity, capacity), else_=level))
+    )
+
+def acquire(buckets, wait_budget=0.0):
+    """
+    Take one token from every bucket in `buckets` ([(key, capacity, per_sec), ...]),
+    all or nothing. Waits up to `wait_budget` seconds for tokens to refill.
+    Returns None when admitted, else the suggested Retry-After in seconds.
+    """
+    deadline = time.monotonic() + wait_budget
+    while True:
+        wait = 0.0
+        with db.engine.begin() as conn:
+            taken = []
+            for key, capacity, per_sec in buckets:
+                wait = _take(conn, key, capacity, per_sec, time.time())
+                if wait:
+                    for k, cap, _ in taken:
+                        _refund(conn, k, cap)
+                    break
+                taken.append((key, capacity, per_sec))
+        if not wait:
+            return None
+        if time.monotonic() + wait > deadline:
+            return wait
+        time.sleep(wait)
+
+def admit_checkout(user_id, client=None):
+    """
+    Per-organizer + platform-wide limit on new Stripe Checkout Sessions.
+
+    Anonymous storefront buyers (`client` = their address) draw from separate
+    buckets: per client, per organizer's page, and a storefront-wide budget. They
+    never touch the door-QR/kiosk ones, so a script hammering event pages can't
+    lock organizers out at the door. Both platform budgets together stay under
+    Stripe's live rate limit.
+    """
+    cfg = current_app.config
+    if client is not None:
+        buckets = [
+            (f"checkout:client:{client}", cfg.get("STOREFRONT_CLIENT_BURST", 3), cfg.get("STOREFRONT_CLIENT_PER_SEC", 0.2)),
+            (f"checkout:store:{user_id}", cfg.get("STOREFRONT_CHECKOUT_BURST", 30), cfg.get("STOREFRONT_CHECKOUT_PER_SEC", 5)),
+            ("checkout:storefront", cfg.get("STOREFRONT_PLATFORM_BURST", 40), cfg.get("STOREFRONT_PLATFORM_PER_SEC", 20)),
+        ]
+    else:
+        buckets = [
+            (f"checkout:user:{user_id}", cfg.get("CHECKOUT_USER_BURST", 3), cfg.get("CHECKOUT_USER_PER_SEC", 0.5)),
+            ("checkout:platform", cfg.get("CHECKOUT_PLATFORM_BURST", 40), cfg.get("CHECKOUT_PLATFORM_PER_SEC", 20)),
+        ]
+    try:
+        return acquire(buckets, wait_budget=cfg.get("CHECKOUT_WAIT_BUDGET", 2.0))
+    except SQLAlchemyError:
+        # Limiter trouble shouldn't take checkout down with it
+        current_app.logger.exception("Checkout rate limiter unavailable; admitting request")
+        return None
@@ -0,0 +1,263 @@
+# reconcile.py
+# `flask reconcile-stripe`: mirror Stripe money movement for every connected
+# account into local tables, then flag anything that doesn't match our tickets.
+#
+# Each (account, resource) pair keeps a cursor (newest `created` seen), so a
+# rerun only pages through objects created since the last run. Charges and
+# application fees change after creation (pending -> succeeded, refunds), so
+# everything created in the last STRIPE_RECONCILE_LOOKBACK is re-listed too.
+#
+# Amounts are checked against the quote stored in the payment metadata at
+# checkout (total_cents / fee_cents); older charges without it are re-priced
+# from the current tickets.
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy.dialects import postgresql, sqlite
+
+from lazy_imports import stripe
+from models import (
+    db, User,
+    StripeSyncCursor, StripeBalanceTransaction, StripeCharge, StripeApplicationFee,
+)
+from pricing import parse_cart_signature, quote_cart
+from queries import pricing_accounts, tickets_by_id
+
+PLATFORM = "platform"  # cursor owner for platform-level lists (charges, application fees)
+PAGE_SIZE = 100        # Stripe max per page
+UPSERT_BATCH = 500     # rows per multi-row INSERT
+MUTABLE = ("charge", "application_fee")  # re-listed over the lookback window
+
+
+# ------------------ Fetchers (run in worker threads, no DB access) ------------------
+def _list_since(resource_cls, since, **params):
+    """Auto-paginate everything created at/after `since` (gte: upserts absorb the overlap)."""
+    return resource_cls.list(limit=PAGE_SIZE, created={"gte": since}, **params).auto_paging_iter()
+
+def _id_of(ref):
+    """Expandable fields come back as an id string or an object; normalize to the id."""
+    if ref is None or isinstance(ref, str):
+        return ref
+    return getattr(ref, "id", None)
+
+def _int_or_none(v):
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return None
+
+def _fetch_balance_transactions(account_id, since):
+    rows = []
+    for t in _list_since(stripe.BalanceTransaction, since, stripe_account=account_id):
+        rows.append({
+            "id": t.id,
+            "account_id": account_id,
+            "type": t.type,
+            "amount": t.amount,
+            "fee": getattr(t, "fee", None) or 0,
+            "net": t.net,
+            "currency": t.currency,
+            "source": _id_of(getattr(t, "source", None)),
+            "created": t.created,
+        })
+    return rows
+
+def _fetch_charges(_account_id, since):
+    # QR checkouts are destination charges, so they live on the platform account;
+    # bucket them by transfer destination instead of calling Stripe per account.
+    rows = []
+    for c in _list_since(stripe.Charge, since):
+        destination = _id_of(getattr(getattr(c, "transfer_data", None), "destination", None))
+        meta = getattr(c, "metadata", None)
+        rows.append({
+            "id": c.id,
+            "account_id": destination or PLATFORM,
+            "amount": c.amount,
+            "amount_refunded": getattr(c, "amount_refunded", None) or 0,
+            "currency": c.currency,
+            "status": c.status,
+            "application_fee_amount": getattr(c, "application_fee_amount", None),
+            "ticket_id": _int_or_none(getattr(meta, "ticket_id", None)),
+            "items": getattr(meta, "items", None),
+            "user_id": _int_or_none(getattr(meta, "user_id", None)),
+            "quoted_total_cents": _int_or_none(getattr(meta, "total_cents", None)),
+            "quoted_fee_cents": _int_or_none(getattr(meta, "fee_cents", None)),
+            "created": c.created,
+        })
+    return rows
+
+def _fetch_application_fees(_account_id, since):
+    rows = []
+    for f in _list_since(stripe.ApplicationFee, since):
+        rows.append({
+            "id": f.id,
+            "account_id": _id_of(f.account),
+            "charge_id": _id_of(getattr(f, "charge", None)),
+            "amount": f.amount,
+            "amount_refunded": getattr(f, "amount_refunded", None) or 0,
+            "currency": f.currency,
+            "created": f.created,
+        })
+    return rows
+
+RESOURCES = {
+    "balance_transaction": (StripeBalanceTransaction, _fetch_balance_transactions),
+    "charge": (StripeCharge, _fetch_charges),
+    "application_fee": (StripeApplicationFee, _fetch_application_fees),
+}
+
+
+# ------------------ Bulk writes ------------------
+def _bulk_upsert(model, rows):
+    """Multi-row INSERT ... ON CONFLICT (id) DO UPDATE, in batches."""
+    if not rows:
+        return
+    table = model.__table__
+    dialect = db.engine.dialect.name
+    if dialect == "postgresql":
+        ins = postgresql.insert(table)
+    elif dialect == "sqlite":
+        ins = sqlite.insert(table)
+    else:
+        for r in rows:
+            db.session.merge(model(**r))
+        return
+    stmt = ins.on_conflict_do_update(
+        index_elements=[table.c.id],
+        set_={c.name: ins.excluded[c.name] for c in table.c if c.name != "id"},
+    )
+    for i in range(0, len(rows), UPSERT_BATCH):
+        db.session.execute(stmt, rows[i:i + UPSERT_BATCH])
+
+def _cursor_for(account_id, resource):
+    cur = StripeSyncCursor.query.filter_by(account_id=account_id, resource=resource).first()
+    if cur is None:
+        cur = StripeSyncCursor(account_id=account_id, resource=resource, last_created=0)
+        db.session.add(cur)
+    return cur
+
+
+# ------------------ Sync ------------------
+def sync_accounts(max_workers=4):
+    """Fetch everything new for every connected account; returns ids of charges touched."""
+    account_ids = [
+        a for (a,) in db.session.query(User.stripe_account_id)
+        .filter(User.stripe_account_id.isnot(None)).distinct()
+    ]
+    jobs = [(a, "balance_transaction") for a in account_ids]
+    jobs += [(PLATFORM, "charge"), (PLATFORM, "application_fee")]
+
+    cursors = {(a, r): _cursor_for(a, r) for a, r in jobs}
+    db.session.commit()
+    relist_from = int(time.time()) - int(current_app.config.get("STRIPE_RECONCILE_LOOKBACK", 7 * 24 * 3600))
+    since = {(a, r): max(0, min(c.last_created, relist_from)) if r in MUTABLE else c.last_created
+             for (a, r), c in cursors.items()}
+
+    touched_charges = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(RESOURCES[resource][1], account_id, since[(account_id, resource)]): (account_id, resource)
+            for account_id, resource in jobs
+        }
+        # Write each job as it lands: one transaction per (account, resource)
+        for fut in as_completed(futures):
+            account_id, resource = futures[fut]
+            try:
+                rows = fut.result()
+            except stripe.error.StripeError as e:
+                click.echo(f"[Reconcile][StripeError] {account_id}/{resource}: {e}", err=True)
+                continue
+
+            model = RESOURCES[resource][0]
+            _bulk_upsert(model, rows)
+            cur = cursors[(account_id, resource)]
+            if rows:
+                cur.last_created = max(cur.last_created, max(r["created"] for r in rows))
+            cur.synced_at = datetime.now(timezone.utc)
+            db.session.commit()
+
+            if resource == "charge":
+                touched_charges.update(r["id"] for r in rows)
+            click.echo(f"[Reconcile] {account_id}/{resource}: {len(rows)} new/updated")
+
+    return touched_charges
+
+
+# ------------------ Mismatch report ------------------
+def find_mismatches(charge_ids=None):
+    """Compare mirrored charges/fees against our tickets. `charge_ids=None` checks everything."""
+    q = StripeCharge.query.filter(StripeCharge.status == "succeeded")
+    if charge_ids is not None:
+        if not charge_ids:
+            return []
+        q = q.filter(StripeCharge.id.in_(list(charge_ids)))
+    charges = q.all()
+
+    # Cart charges carry "7x2,9x1"; older single-ticket charges only have ticket_id
+    carts = {c.id: parse_cart_signature(c.items) or ([(c.ticket_id, 1)] if c.ticket_id else None) for c in charges}
+    wanted_ids = {tid for pairs in carts.values() if pairs for tid, _ in pairs}
+    tickets = tickets_by_id(wanted_ids)
+    users = pricing_accounts()
+    account_owner = {u.stripe_account_id: u for u in users.values() if u.stripe_account_id}
+    fees = {}
+    for f in StripeApplicationFee.query.filter(StripeApplicationFee.charge_id.in_([c.id for c in charges])).all():
+        fees[f.charge_id] = fees.get(f.charge_id, 0) + f.amount
+
+    problems = []
+    for c in charges:
+        if c.account_id != PLATFORM and c.account_id not in account_owner:
+            problems.append((c.id, "unknown_account", f"destination {c.account_id} is not a known organizer"))
+        pairs = carts[c.id]
+        if not pairs:
+            problems.append((c.id, "no_ticket_metadata", f"{c.amount}c charge has no ticket_id/items metadata"))
+            continue
+        quoted = c.quoted_total_cents is not None and c.quoted_fee_cents is not None
+        label = f"ticket {pairs[0][0]}" if len(pairs) == 1 and pairs[0][1] == 1 else f"cart {c.items}"
+        missing = [tid for tid, _ in pairs if tid not in tickets]
+        if missing:
+            problems.append((c.id, "unknown_ticket", f"ticket(s) {', '.join(map(str, missing))} no longer exist"))
+            if not quoted:
+                continue
+        else:
+            owners = {tickets[tid].user_id for tid, _ in pairs}
+            owner = users.get(next(iter(owners)))
+            if len(owners) > 1:
+                problems.append((c.id, "mixed_organizers", f"cart {c.items} spans organizers {sorted(owners)}"))
+            if c.account_id != PLATFORM and owner is not None and owner.stripe_account_id != c.account_id:
+                problems.append((c.id, "wrong_destination", f"{label} belongs to {owner.stripe_account_id}, paid to {c.account_id}"))
+
+        if quoted:
+            # What checkout charged for; later price/fee edits don't change it
+            total_cents, fee_cents = c.quoted_total_cents, c.quoted_fee_cents
+        else:
+            # Charges from before the quote was stored: best guess is today's prices
+            quote = quote_cart([(tickets[tid], qty) for tid, qty in pairs], owner)
+            total_cents, fee_cents = quote.total_cents, quote.platform_fee_cents
+        if c.amount != total_cents:
+            problems.append((c.id, "amount_mismatch", f"charged {c.amount}c, {label} quotes {total_cents}c"))
+        if c.account_id != PLATFORM:
+            got = fees.get(c.id)
+            if got is None:
+                problems.append((c.id, "missing_application_fee", f"expected {c.application_fee_amount}c fee"))
+            elif got != (c.application_fee_amount or 0) or got != fee_cents:
+                problems.append((c.id, "fee_mismatch", f"fee {got}c, charge says {c.application_fee_amount}c, quote {fee_cents}c"))
+    return problems
+
+
+@click.command("reconcile-stripe")
+@click.option("--workers", type=int, default=lambda: int(os.getenv("STRIPE_RECONCILE_WORKERS", 4)), show_default="4",
+              help="Concurrent Stripe fetches.")
+@click.option("--all", "check_all", is_flag=True, help="Re-check every mirrored charge, not just this run's.")
+@with_appcontext
+def reconcile_command(workers, check_all):
+    """Sync Stripe activity for connected accounts and report mismatches."""
+    touched = sync_accounts(max_workers=max(1, workers))
+    problems = find_mismatches(None if check_all else touched)
+    for charge_id, kind, detail in problems:
+        click.echo(f"[Reconcile][Mismatch] {charge_id} {kind}: {detail}")
+    click.echo(f"[Reconcile] checked {'all' if check_all else len(touched)} charges, {len(problems)} mismatches")
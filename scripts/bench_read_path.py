@@ -0,0 +1,110 @@
+# scripts/bench_read_path.py
+# Per-request cost of the ticket listing read path: ORM objects vs the column
+# projections in queries.py, plus the reload a commit costs with and without
+# expire_on_commit. Uses a throwaway SQLite file. Run from the repo root:
+#   python scripts/bench_read_path.py [tickets] [iterations]
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+tmp = tempfile.mkdtemp(prefix="read-path-bench-")
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from sqlalchemy import event  # noqa: E402
+
+from app import create_app  # noqa: E402
+from models import db, User, Ticket  # noqa: E402
+from pricing import quote_ticket  # noqa: E402
+from queries import tickets_for_user  # noqa: E402
+
+
+def orm_listing(user):
+    return [(t.id, t.name, quote_ticket(t, user).total_cents) for t in Ticket.query.filter_by(user_id=user.id).all()]
+
+def row_listing(user):
+    return [(t.id, t.name, quote_ticket(t, user).total_cents) for t in tickets_for_user(user.id)]
+
+
+def measure(fn, iterations):
+    """(ms per call, peak KiB held during one call) with a fresh session per call, like a request."""
+    def once():
+        user = db.session.get(User, 1)
+        fn(user)
+        db.session.remove()
+
+    once()  # warm caches (compiled SQL, mapper config)
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        once()
+    elapsed = (time.perf_counter() - t0) / iterations * 1000
+
+    tracemalloc.start()
+    peaks = []
+    for _ in range(min(iterations, 20)):
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        once()
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - base)
+    tracemalloc.stop()
+    return elapsed, sorted(peaks)[len(peaks) // 2] / 1024
+
+
+def commit_reloads(expire_on_commit, iterations):
+    """SELECTs issued by 'change fee, commit, render' (dashboard POST) per request."""
+    statements, reloads = [], 0
+    listener = lambda *a: statements.append(a[2])  # noqa: E731
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        for _ in range(iterations):
+            db.session.remove()
+            session = db.session()
+            session.expire_on_commit = expire_on_commit
+            user = session.get(User, 1)
+            user.fee_percent = 10.0 if user.fee_percent != 10.0 else 12.0
+            session.flush()
+            mark = len(statements)
+            session.commit()
+            _ = (user.email, user.fee_percent, user.stripe_account_id)  # what the redirect/render reads
+            reloads += sum(1 for s in statements[mark:] if s.lstrip().upper().startswith("SELECT"))
+        return reloads
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+        db.session.remove()
+
+
+def main():
+    n_tickets = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    app = create_app({"TESTING": True})
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, email="bench@example.com", password="x", fee_percent=12.0))
+        db.session.execute(Ticket.__table__.insert(), [
+            {"name": f"Tier {i}", "price": 10 + i % 40, "user_id": 1} for i in range(n_tickets)
+        ])
+        db.session.commit()
+
+        print(f"listing {n_tickets} tickets, {iterations} iterations")
+        results = {}
+        for label, fn in (("ORM objects", orm_listing), ("row projection", row_listing)):
+            results[label] = measure(fn, iterations)
+            ms, peak = results[label]
+            print(f"  {label:16s} {ms:8.3f} ms/request  {peak:9.1f} KiB peak memory/request")
+        orm, rows = results["ORM objects"], results["row projection"]
+        print(f"  -> {orm[0] / rows[0]:.1f}x faster, {orm[1] / rows[1]:.1f}x less memory")
+
+        print("commit then read the user back (dashboard POST):")
+        for flag in (True, False):
+            selects = commit_reloads(flag, 20)
+            print(f"  expire_on_commit={flag!s:5s}  {selects / 20:.1f} reload SELECTs/request")
+
+
+if __name__ == "__main__":
+    main()
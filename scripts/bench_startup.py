@@ -0,0 +1,46 @@
+# scripts/bench_startup.py
+# Measures how long a fresh worker takes to build the app, with and without the
+# heavy imports that lazy_imports.py defers. Run from the repo root:
+#   python scripts/bench_startup.py [runs]
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPETS = {
+    "create_app (lazy)": "import app; app.create_app()",
+    "create_app + warm (old eager boot)": "import app; app.create_app(); import lazy_imports; lazy_imports.warm()",
+    "create_app + first request": (
+        "import app; a = app.create_app(); a.test_client().get('/_debug')"
+    ),
+}
+
+TIMER = """
+import time
+_t = time.perf_counter()
+{code}
+print((time.perf_counter() - _t) * 1000)
+"""
+
+def run(code, runs):
+    env = dict(os.environ)
+    env.pop("FLASK_RUN_FROM_CLI", None)
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", TIMER.format(code=code)],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    for label, code in SNIPPETS.items():
+        s = run(code, runs)
+        print(f"{label:<38} median {statistics.median(s):7.1f} ms   min {min(s):7.1f} ms   ({runs} runs)")
+
+if __name__ == "__main__":
+    main()
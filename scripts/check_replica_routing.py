@@ -0,0 +1,63 @@
+# scripts/check_replica_routing.py
+# Local check for db_routing.py using two SQLite files as "primary" and "replica".
+# Nothing replicates between them, so whichever copy a read returns shows where
+# it was routed. Run from the repo root:
+#   python scripts/check_replica_routing.py
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+tmp = tempfile.mkdtemp(prefix="replica-check-")
+primary = f"sqlite:///{os.path.join(tmp, 'primary.db')}"
+replica = f"sqlite:///{os.path.join(tmp, 'replica.db')}"
+os.environ["SQLALCHEMY_DATABASE_URI"] = primary
+os.environ["SQLALCHEMY_REPLICA_URIS"] = replica
+
+from flask_bcrypt import generate_password_hash  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+
+from app import create_app  # noqa: E402
+from models import db, User, Ticket  # noqa: E402
+
+
+def main():
+    app = create_app({"TESTING": True, "WTF_CSRF_ENABLED": False, "READ_YOUR_WRITES_SECONDS": 2})
+    with app.app_context():
+        db.create_all()
+        # Same user on both sides; tickets named after the database they live in
+        pw = generate_password_hash("password123").decode()
+        for uri in (primary, replica):
+            engine = create_engine(uri)
+            db.metadata.create_all(engine)
+            with engine.begin() as conn:
+                conn.execute(User.__table__.insert().values(id=1, email="org@example.com", password=pw, fee_percent=12.0))
+                name = "from-primary" if uri == primary else "from-replica"
+                conn.execute(Ticket.__table__.insert().values(name=name, price=10.0, user_id=1))
+
+    client = app.test_client()
+    client.post("/login", data={"email": "org@example.com", "password": "password123"})
+
+    def reads_from():
+        html = client.get("/dashboard").get_data(as_text=True)
+        return "primary" if "from-primary" in html else "replica" if "from-replica" in html else "?"
+
+    checks = []
+    checks.append(("GET before any write", reads_from(), "replica"))
+    client.post("/dashboard", data={"name": "new-tier", "price": "15"})
+    checks.append(("GET right after a write", reads_from(), "primary"))
+
+    import time
+    time.sleep(2.1)
+    checks.append(("GET after READ_YOUR_WRITES_SECONDS", reads_from(), "replica"))
+
+    ok = True
+    for label, got, want in checks:
+        ok &= got == want
+        print(f"{'ok ' if got == want else 'BAD'}  {label:<55} -> {got} (want {want})")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
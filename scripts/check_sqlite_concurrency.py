@@ -0,0 +1,136 @@
+# scripts/check_sqlite_concurrency.py
+# Hammer one SQLite file the way gunicorn does: several forked worker processes,
+# each with a few threads, all registering users and creating tickets (the
+# dashboard's ticket + fee write, which also bumps ticket_version) while others
+# read ticket listings. Runs once without sqlite_profile.py and once with it,
+# on fresh throwaway databases. Run from the repo root:
+#   python scripts/check_sqlite_concurrency.py [processes] [threads] [ops per thread]
+# Exits non-zero if anything failed with the profile on.
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+from sqlalchemy import func, select  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from app import create_app  # noqa: E402
+from models import db, User, Ticket  # noqa: E402
+from queries import tickets_for_user  # noqa: E402
+
+ORGANIZERS = 4
+
+
+def _make_app(db_path, profile):
+    return create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "SQLITE_PROFILE": profile,
+    })
+
+def _op(i, worker, thread):
+    """Alternate: register a user / create a ticket and set the fee / read a listing."""
+    kind = i % 3
+    if kind == 0:
+        db.session.add(User(email=f"w{worker}-t{thread}-{i}@example.com", password="x"))
+        db.session.commit()
+    elif kind == 1:
+        user = db.session.get(User, 1 + i % ORGANIZERS)
+        user.fee_percent = 10.0 + i % 5
+        db.session.add(Ticket(name=f"T{worker}.{thread}.{i}", price=10.0, user_id=user.id))
+        db.session.commit()
+    else:
+        tickets_for_user(1 + i % ORGANIZERS)
+    return kind
+
+def _worker(db_path, profile, worker, threads, ops, out):
+    app = _make_app(db_path, profile)
+    results = []
+
+    def run(thread):
+        done, errors, latencies = {0: 0, 1: 0, 2: 0}, [], []
+        for i in range(ops):
+            with app.app_context():
+                start = time.perf_counter()
+                try:
+                    done[_op(i, worker, thread)] += 1
+                except OperationalError as e:
+                    db.session.rollback()
+                    errors.append(str(e.orig))
+                except Exception:
+                    db.session.rollback()
+                    errors.append(traceback.format_exc(limit=1))
+                latencies.append(time.perf_counter() - start)
+                db.session.remove()
+        results.append((done, errors, latencies))
+
+    pool = [threading.Thread(target=run, args=(t,)) for t in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    out.put(results)
+
+def run_mode(profile, processes, threads, ops):
+    db_path = os.path.join(tempfile.mkdtemp(prefix="sqlite-check-"), "app.db")
+    app = _make_app(db_path, profile)
+    with app.app_context():
+        db.create_all()
+        for n in range(ORGANIZERS):
+            db.session.add(User(id=n + 1, email=f"org{n}@example.com", password="x"))
+        db.session.commit()
+        versions_before = db.session.execute(select(func.sum(User.ticket_version))).scalar()
+        journal = db.session.execute(db.text("PRAGMA journal_mode")).scalar()
+        db.session.remove()
+        db.engine.dispose()
+
+    ctx = mp.get_context("fork")
+    out = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(db_path, profile, w, threads, ops, out)) for w in range(processes)]
+    t0 = time.perf_counter()
+    for p in procs:
+        p.start()
+    results = [r for _ in procs for r in out.get()]
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - t0
+
+    registered = sum(r[0][0] for r in results)
+    tickets = sum(r[0][1] for r in results)
+    errors = [e for r in results for e in r[1]]
+    latencies = sorted(x for r in results for x in r[2])
+    with app.app_context():
+        users = db.session.execute(select(func.count(User.id))).scalar() - ORGANIZERS
+        rows = db.session.execute(select(func.count(Ticket.id))).scalar()
+        bumps = db.session.execute(select(func.sum(User.ticket_version))).scalar() - versions_before
+
+    label = "with sqlite_profile" if profile else "without profile   "
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0
+    print(f"  {label} journal={journal:<6} {len(latencies) / elapsed:7.0f} ops/s  p99 {p99:7.1f} ms  "
+          f"errors {len(errors):4d}  users {users}/{registered}  tickets {rows}/{tickets}  version bumps {bumps}")
+    for msg in sorted(set(errors))[:3]:
+        print(f"      {errors.count(msg)}x {msg.strip().splitlines()[-1]}")
+    consistent = users == registered and rows == tickets == bumps
+    return not errors and consistent
+
+
+def main():
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    ops = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    print(f"{processes} processes x {threads} threads x {ops} ops (1/3 registrations, 1/3 ticket writes, 1/3 reads)")
+    run_mode(False, processes, threads, ops)
+    ok = run_mode(True, processes, threads, ops)
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
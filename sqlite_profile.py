@@ -0,0 +1,158 @@
+# sqlite_profile.py
+# Production settings for running on a single SQLite file with several gunicorn
+# workers (and threads). No-op for any other database.
+#
+#   - PRAGMAs on every new connection: WAL (readers never block the writer),
+#     synchronous=NORMAL (safe with WAL; fsync at checkpoints, not every commit),
+#     busy_timeout, a bigger page cache, mmap'd reads and in-memory temp tables.
+#   - One writer at a time, across threads AND processes. SQLite only ever runs
+#     one write transaction anyway; left to itself, every waiting writer sleeps
+#     and re-polls in its busy handler, and under a burst some give up with
+#     "database is locked". Here a writer instead waits its turn on a process
+#     mutex + an flock() on a file next to the database, then runs without
+#     contention.
+#
+# pysqlite opens the transaction lazily, right before the first INSERT/UPDATE/
+# DELETE, so the lock is taken there (before_cursor_execute) and released when
+# the connection goes back to the pool (or is thrown away). Reads never
+# take it. If the lock can't be had within SQLITE_WRITE_LOCK_TIMEOUT we carry on
+# without it and let busy_timeout deal with it, same as before.
+#
+# Local check: scripts/check_sqlite_concurrency.py
+import fcntl
+import logging
+import os
+import re
+import threading
+import time
+
+from sqlalchemy import event
+
+log = logging.getLogger(__name__)
+
+_WRITE_RE = re.compile(r"^\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER)\b", re.IGNORECASE)
+_HELD = "sqlite_write_lock"
+
+
+class WriteLock:
+    """
+    Re-entrant per thread (a thread already inside a write transaction may open
+    a second connection without deadlocking on itself), exclusive across threads
+    via a mutex and across processes via flock(). The lock file is opened per
+    process, since a forked child shares its parent's open file description.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._mutex = threading.Lock()
+        self._owner = None
+        self._depth = 0
+        self._fd = None
+        self._pid = None
+
+    def _file(self):
+        if self._pid != os.getpid():
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            self._pid = os.getpid()
+        return self._fd
+
+    def acquire(self, timeout):
+        me = threading.get_ident()
+        if self._owner == me:
+            self._depth += 1
+            return True
+        deadline = time.monotonic() + timeout
+        if not self._mutex.acquire(timeout=timeout):
+            return False
+        # flock has no timeout; other processes' writes are short, so poll briefly
+        delay = 0.0005
+        while True:
+            try:
+                fcntl.flock(self._file(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    self._mutex.release()
+                    return False
+                time.sleep(delay)
+                delay = min(delay * 2, 0.01)
+        self._owner, self._depth = me, 1
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if self._depth > 0:
+            return
+        self._owner = None
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            self._mutex.release()
+
+    def _after_fork(self):
+        # A thread of the parent may have held it; nobody in the child does
+        self._mutex = threading.Lock()
+        self._owner, self._depth, self._pid = None, 0, None
+
+
+def _pragmas(cfg):
+    return (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={int(cfg.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}",
+        f"PRAGMA cache_size=-{int(cfg.get('SQLITE_CACHE_SIZE_KB', 16384))}",  # negative = KiB, per connection
+        f"PRAGMA mmap_size={int(cfg.get('SQLITE_MMAP_SIZE_MB', 256)) * 1024 * 1024}",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA journal_size_limit=67108864",  # truncate the WAL back to 64MiB after checkpoints
+    )
+
+def configure_engine(engine, cfg):
+    pragmas = _pragmas(cfg)
+    lock_timeout = float(cfg.get("SQLITE_WRITE_LOCK_TIMEOUT", 10.0))
+    db_path = engine.url.database
+    lock = None
+    if db_path and db_path != ":memory:" and cfg.get("SQLITE_SERIALIZE_WRITES", True):
+        lock = WriteLock(cfg.get("SQLITE_WRITE_LOCK_PATH") or os.path.abspath(db_path) + ".write-lock")
+        os.register_at_fork(after_in_child=lock._after_fork)
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_conn, connection_record):
+        cur = dbapi_conn.cursor()
+        try:
+            for pragma in pragmas:
+                cur.execute(pragma)
+        finally:
+            cur.close()
+
+    if lock is None:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _queue_writer(conn, cursor, statement, parameters, context, executemany):
+        # record_info, not info: it survives invalidation, so a held lock can't be forgotten
+        held = conn.connection.record_info
+        if held.get(_HELD) or not _WRITE_RE.match(statement):
+            return
+        start = time.monotonic()
+        if lock.acquire(lock_timeout):
+            held[_HELD] = True
+        else:
+            log.warning("sqlite write lock timed out; falling back to busy_timeout",
+                        extra={"category": "sqlite.write_lock_timeout", "waited": round(time.monotonic() - start, 3)})
+
+    def _release(dbapi_conn, connection_record, *args):
+        # checkin runs after the pool's rollback-on-return, so the transaction is over
+        if connection_record is not None and connection_record.record_info.pop(_HELD, False):
+            lock.release()
+
+    event.listen(engine.pool, "checkin", _release)
+    event.listen(engine.pool, "invalidate", _release)
+
+def init_app(app):
+    """Apply the profile to every SQLite engine of `db` (call after db.init_app)."""
+    if not app.config.get("SQLITE_PROFILE", True):
+        return
+    from extensions import db
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == "sqlite":
+                configure_engine(engine, app.config)
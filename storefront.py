@@ -0,0 +1,268 @@
+# storefront.py
+# Public event page per organizer, so buyers can pay from a shared link instead
+# of only from a QR the organizer shows them.
+#
+#   GET  /e/<slug>               ticket list + buy button (no login)
+#   POST /e/<slug>/buy           starts Stripe Checkout, 303s to it
+#   POST /dashboard/event-page   organizer publishes/unpublishes the page
+#
+# Opt-in: there's no page until the organizer publishes one, and its URL is a
+# random slug (User.storefront_slug), not a guessable user id.
+#
+# The page is rendered once and kept on disk (plus a gzipped copy), shared by
+# every gunicorn worker. A hit is a stat() and a read: no DB, no Jinja, no
+# session cookie, so a CDN/reverse proxy may cache it too (public, s-maxage,
+# Surrogate-Key: store-<id> for purge-by-tag). The file is dropped after any
+# commit that changes the organizer's tickets or fee (models.TICKETS_CHANGED),
+# and re-rendered after STOREFRONT_CACHE_TTL regardless.
+#
+# The cache is per host: with several app servers behind a balancer, another
+# host may serve its copy until that copy's TTL runs out.
+import gzip
+import hashlib
+import logging
+import math
+import os
+import re
+import secrets
+import tempfile
+import time
+from urllib.parse import quote_plus
+
+from flask import (
+    Blueprint, abort, current_app, flash, has_app_context, make_response, redirect, render_template, request, url_for,
+)
+from flask_login import current_user, login_required
+from sqlalchemy import event, select
+
+from checkout import CheckoutRateLimited, cart_from_form, checkout_for_cart
+from db_routing import RoutingSession
+from extensions import csrf
+from http_cache import skip_session
+from models import db, Ticket, User, TICKETS_CHANGED
+from pricing import quote_cart, quote_ticket
+from queries import TICKET_COLUMNS, tickets_for_user
+
+log = logging.getLogger(__name__)
+storefront_bp = Blueprint("storefront", __name__)
+
+_BUYER_RE = re.compile(r"^[A-Za-z0-9-]{8,64}$")
+_SLUG_RE = re.compile(r"^[A-Za-z0-9_-]{8,32}$")
+
+
+def new_slug():
+    return secrets.token_urlsafe(12)  # 16 chars
+
+
+# ------------------ Page cache ------------------
+def _cache_dir():
+    return current_app.config.get("STOREFRONT_CACHE_DIR") or os.path.join(current_app.instance_path, "storefront")
+
+def _paths(slug):
+    base = os.path.join(_cache_dir(), f"{slug}.html")
+    return base, base + ".gz"
+
+def _pointer(user_id):
+    # by-user/<id> holds the slug its page was cached under, so invalidation
+    # (which only knows user ids) never needs the database
+    return os.path.join(_cache_dir(), "by-user", str(int(user_id)))
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+def invalidate(user_ids):
+    """Drop cached pages; the next visitor re-renders."""
+    for uid in user_ids:
+        pointer = _pointer(uid)
+        try:
+            with open(pointer) as f:
+                slug = f.read().strip()
+        except FileNotFoundError:
+            continue
+        if _SLUG_RE.match(slug):
+            for path in _paths(slug):
+                _unlink(path)
+        _unlink(pointer)
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)  # readers see the old file or the new one, never half of one
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def _render(slug):
+    """Render + store the page. Returns the HTML bytes, or None if no organizer published `slug`."""
+    # Straight to the primary on a plain connection: a lagging replica would get
+    # cached for the whole TTL, and the Flask session is never touched (no Vary: Cookie)
+    with db.engine.connect() as conn:
+        organizer = conn.execute(
+            select(User.id, User.fee_percent, User.ticket_version).where(User.storefront_slug == slug)
+        ).first()
+        if organizer is None:
+            return None
+        tickets = conn.execute(
+            select(*TICKET_COLUMNS).where(Ticket.user_id == organizer.id).order_by(Ticket.id)
+        ).all()
+    html = render_template(
+        "storefront.html",
+        slug=slug,
+        items=[(t, quote_ticket(t, organizer)) for t in tickets],
+        max_qty=current_app.config.get("CART_MAX_QUANTITY", 20),
+    ).encode()
+
+    html_path, gz_path = _paths(slug)
+    pointer = _pointer(organizer.id)
+    os.makedirs(os.path.dirname(pointer), exist_ok=True)
+    _write_atomic(gz_path, gzip.compress(html, compresslevel=9, mtime=0))
+    _write_atomic(html_path, html)
+    _write_atomic(pointer, slug.encode())
+
+    # Tickets changed (or the page was unpublished) while we rendered? The
+    # committer's invalidate() may have already run, so drop our stale copy
+    # ourselves. Fresh connection: on SQLite the first one would still be
+    # reading its old snapshot.
+    with db.engine.connect() as conn:
+        now = conn.execute(select(User.ticket_version, User.storefront_slug).where(User.id == organizer.id)).first()
+    if now is None or now.ticket_version != organizer.ticket_version or now.storefront_slug != slug:
+        for path in (html_path, gz_path):
+            _unlink(path)
+        invalidate([organizer.id])
+    return html
+
+def _fresh(path, ttl):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st if time.time() - st.st_mtime < ttl else None
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _invalidate_on_commit(session):
+    changed = session.info.pop(TICKETS_CHANGED, None)
+    if changed and has_app_context():
+        invalidate(changed)
+
+
+# ------------------ Routes ------------------
+@storefront_bp.get("/e/<slug>")
+def page(slug):
+    if not _SLUG_RE.match(slug):
+        abort(404)
+    cfg = current_app.config
+    html_path, gz_path = _paths(slug)
+    st = _fresh(html_path, cfg.get("STOREFRONT_CACHE_TTL", 600))
+    if st is None:
+        if _render(slug) is None:
+            abort(404)
+        try:
+            st = os.stat(html_path)
+        except FileNotFoundError:
+            abort(404)  # unpublished while we rendered
+
+    use_gz = bool(request.accept_encodings["gzip"]) and os.path.exists(gz_path)
+    try:
+        with open(gz_path if use_gz else html_path, "rb") as f:
+            body = f.read()
+    except FileNotFoundError:
+        # Invalidated between stat and open; this one request renders inline
+        body = _render(slug)
+        if body is None:
+            abort(404)
+        use_gz = False
+
+    resp = make_response(body)
+    resp.mimetype = "text/html"
+    skip_session()  # same page for everyone (no Vary: Cookie)
+    if use_gz:
+        resp.headers["Content-Encoding"] = "gzip"  # compress_response leaves it alone
+    resp.headers["Vary"] = "Accept-Encoding"
+    resp.headers["Surrogate-Key"] = f"store-{slug}"
+    cc = resp.cache_control
+    cc.public = True
+    cc.max_age = cfg.get("STOREFRONT_MAX_AGE", 30)
+    cc.s_maxage = cfg.get("STOREFRONT_S_MAXAGE", 60)
+    cc.stale_while_revalidate = cfg.get("STOREFRONT_S_MAXAGE", 60)
+    resp.set_etag(f"store-{slug}-{st.st_mtime_ns}-{st.st_size}", weak=True)
+    return resp.make_conditional(request)
+
+
+def _buyer_key():
+    """The page's per-browser nonce; falls back to the client's address + UA."""
+    raw = request.form.get("buyer", "")
+    if _BUYER_RE.match(raw):
+        return raw
+    ident = f"{request.remote_addr}|{request.user_agent.string}"
+    return hashlib.sha256(ident.encode()).hexdigest()[:32]
+
+def _no_store(resp):
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+def _notice(message, status, retry_after=None):
+    resp = make_response(render_template("storefront_notice.html", message=message,
+                                         back_url=url_for("storefront.page", slug=request.view_args["slug"])), status)
+    if retry_after:
+        resp.headers["Retry-After"] = str(retry_after)
+    return _no_store(resp)
+
+
+@storefront_bp.post("/e/<slug>/buy")
+@csrf.exempt  # anonymous buyers; no session cookie to protect
+def buy(slug):
+    organizer = User.query.filter_by(storefront_slug=slug).first() if _SLUG_RE.match(slug) else None
+    if organizer is None:
+        abort(404)
+    user_id = organizer.id
+    wanted = cart_from_form(request.form)
+    if not wanted:
+        return _notice("Pick at least one ticket.", 400)
+    tickets = tickets_for_user(user_id, ids=wanted)
+    if len(tickets) != len(wanted):
+        # Tickets changed since the page was cached; the next load shows the new list
+        return _notice("Those tickets aren’t available anymore.", 409)
+    cart = quote_cart([(t, wanted[t.id]) for t in tickets], organizer)
+
+    success_url = (
+        "https://teameventlock.com/success"
+        f"?ticket={quote_plus(cart.describe())}&price={cart.total_price:.2f}"
+    )
+    cancel_url = url_for("storefront.page", slug=slug, _external=True)
+    try:
+        co = checkout_for_cart(organizer, cart, success_url, cancel_url,
+                               buyer=_buyer_key(), client=request.remote_addr or "unknown")
+    except CheckoutRateLimited as e:
+        wait_s = max(1, math.ceil(e.retry_after))
+        log.warning("storefront checkout rate limited", extra={"category": "storefront.rate_limited", "user_id": user_id, "retry_after": wait_s})
+        return _notice(f"Tickets are selling fast. Please try again in {wait_s} seconds.", 429, retry_after=wait_s)
+    except Exception:
+        log.exception("storefront checkout failed", extra={"category": "storefront.stripe_error", "user_id": user_id, "items": cart.signature})
+        return _notice("Couldn’t start checkout. Please try again.", 502)
+
+    log.info("storefront checkout", extra={"category": "storefront.checkout", "session_id": co.session_id, "user_id": user_id,
+                                           "items": cart.signature, "total_cents": cart.total_cents, "reused": co.reused})
+    return _no_store(redirect(co.url, code=303))
+
+
+@storefront_bp.post("/dashboard/event-page")
+@login_required
+def publish():
+    """Turn the organizer's public page on (new random URL) or off."""
+    if request.form.get("action") == "publish":
+        if not current_user.storefront_slug:
+            current_user.storefront_slug = new_slug()
+            db.session.commit()
+            flash("Your event page is live. Share the link below.")
+    elif current_user.storefront_slug:
+        current_user.storefront_slug = None
+        db.session.commit()
+        invalidate([current_user.id])
+        flash("Your event page is offline. The old link no longer works.")
+    return redirect(url_for("main.dashboard"))
@@ -0,0 +1,131 @@
+# ticket_import.py
+# Bulk ticket import for the dashboard (CSV or JSON upload).
+#
+#   CSV:  name,price[,fee_percent]      (header row required)
+#   JSON: [{"name": "GA", "price": 20, "fee_percent": 10}, ...]
+#
+# Every row is validated before anything is written; if any row is bad, nothing
+# is imported and the caller gets the full list of row errors. Good files go in
+# as multi-row INSERTs inside one transaction.
+import csv
+import io
+import json
+import math
+from dataclasses import dataclass
+
+from flask import current_app
+
+from models import db, Ticket, bump_ticket_version
+from pricing import MIN_FEE_PERCENT, MAX_FEE_PERCENT
+
+INSERT_BATCH = 500
+NAME_MAX = Ticket.__table__.c.name.type.length
+
+
+class TicketImportError(Exception):
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid row(s)")
+        self.errors = errors  # ["row 3: price must be a number", ...]
+
+
+@dataclass(frozen=True)
+class ImportResult:
+    created: int
+    version: int
+
+
+def parse_upload(filename, data: bytes):
+    """Raw upload -> list of dicts. JSON if the name/content says so, else CSV."""
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise TicketImportError(["file must be UTF-8 text"])
+
+    if (filename or "").lower().endswith(".json") or text.lstrip().startswith("["):
+        try:
+            rows = json.loads(text)
+        except ValueError as e:
+            raise TicketImportError([f"invalid JSON: {e}"])
+        if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+            raise TicketImportError(["JSON must be a list of objects"])
+        return rows
+
+    reader = csv.DictReader(io.StringIO(text))
+    fields = {(f or "").strip().lower() for f in (reader.fieldnames or [])}
+    if not {"name", "price"} <= fields:
+        raise TicketImportError(["CSV needs a header row with at least name,price"])
+    return [{(k or "").strip().lower(): v for k, v in row.items()} for row in reader]
+
+
+def _number(value):
+    if isinstance(value, bool):
+        raise ValueError
+    n = float(str(value).strip().lstrip("$")) if isinstance(value, str) else float(value)
+    if not math.isfinite(n):
+        raise ValueError
+    return n
+
+def validate_rows(rows, user_id):
+    """One pass over every row; returns insert-ready dicts or raises with all the errors."""
+    max_rows = int(current_app.config.get("TICKET_IMPORT_MAX_ROWS", 1000))
+    if not rows:
+        raise TicketImportError(["file has no ticket rows"])
+    if len(rows) > max_rows:
+        raise TicketImportError([f"too many rows ({len(rows)}); limit is {max_rows}"])
+
+    clean, errors = [], []
+    for i, row in enumerate(rows, start=1):
+        name = str(row.get("name") or "").strip()
+        if not name:
+            errors.append(f"row {i}: name is required")
+        elif len(name) > NAME_MAX:
+            errors.append(f"row {i}: name longer than {NAME_MAX} characters")
+
+        try:
+            price = round(_number(row.get("price")), 2)
+            if price <= 0:
+                errors.append(f"row {i}: price must be more than 0")  # same as the dashboard form
+        except (TypeError, ValueError):
+            errors.append(f"row {i}: price must be a number")
+            price = None
+
+        fee = row.get("fee_percent")
+        if fee is None or str(fee).strip() == "":
+            fee = None  # fall back to the organizer's fee, same as the dashboard form
+        else:
+            try:
+                fee = _number(fee)
+                if not MIN_FEE_PERCENT <= fee <= MAX_FEE_PERCENT:
+                    errors.append(f"row {i}: fee_percent must be between {MIN_FEE_PERCENT:g} and {MAX_FEE_PERCENT:g}")
+            except (TypeError, ValueError):
+                errors.append(f"row {i}: fee_percent must be a number")
+
+        clean.append({"name": name, "price": price, "fee_percent": fee, "user_id": user_id})
+
+    if errors:
+        raise TicketImportError(errors)
+    return clean
+
+
+def import_tickets(user, rows):
+    """
+    Insert validated rows for `user` in one transaction.
+
+    Core INSERTs skip the ORM flush hooks, so the ticket_version bump happens
+    here, once for the whole file.
+    """
+    rows = validate_rows(rows, user.id)
+    table = Ticket.__table__
+    try:
+        for i in range(0, len(rows), INSERT_BATCH):
+            db.session.execute(table.insert(), rows[i:i + INSERT_BATCH])
+        conn = db.session.connection()
+        bump_ticket_version(conn, [user.id], db.session)
+        # checkout_session rows stay: new tickets can't change an existing cart's
+        # price, and the webhook/kiosk still need the open sessions
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    db.session.expire(user, ["ticket_version"])
+    return ImportResult(created=len(rows), version=user.ticket_version)
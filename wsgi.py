@@ -0,0 +1,4 @@
+# wsgi.py — `gunicorn wsgi:app` (or use gunicorn.conf.py, which calls the factory)
+from app import create_app
+
+app = create_app()